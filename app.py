@@ -1,55 +1,273 @@
 import streamlit as st
-import os
 import logging
-from src.api.youtube import find_similar_tracks, analyze_keyword_realtime, get_youtube_client
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+from src.api.youtube import find_similar_tracks, analyze_keyword_realtime, get_keyword_suggestions, get_youtube_client
+from src.api.cache_warmer import CACHE_WARMER_ENV, start_cache_warmer
 from src.api.youtube_seo import generate_seo_tags
-from src.api.keyword_analyzer import analyze_keywords, get_fallback_data
-from src.Audio.analyzer import analyze_audio
+from src.api.keyword_analyzer import analyze_keywords
+from src.Audio.analyzer import analyze_audio, ANALYZER_VERSION
+from src.Audio.decode import AUDIO_EXTENSIONS, write_temporary_audio
+from src.Audio.fingerprint import fingerprint_audio, fingerprint_index, lookup_analysis
+from src.Audio.profiles import DEFAULT_PROFILE, PROFILES
+from src.utlis.analysis_cache import analysis_cache
+from src.utlis.executor import get_process_pool, remove_when_done, session_thread_pool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def process_audio_file(file):
-    """Process uploaded audio file and extract features"""
-    try:
-        logger.info(f"Processing file: {file.name}")
-        # Save temporary file
-        with open("temp.wav", "wb") as f:
-            f.write(file.getbuffer())
+PREVIEW_PROFILE = "fast"
+DEFAULT_FEATURES = {
+    "bpm": "128",
+    "key": "C Major",
+    "energy": "Medium",
+    "genre": "House"
+}
+
+def render_analysis(slot, track_features: dict, preliminary: bool) -> None:
+    """Analysis tab: key metrics for the current best estimate"""
+    with slot.container():
+        if preliminary:
+            st.info("Quick estimate - refining with the full analysis...")
+        else:
+            st.success("Analysis complete!")
+        col3, col4 = st.columns(2)
+        with col3:
+            st.metric("Genre", track_features["genre"])
+            st.metric("Key", track_features["key"])
+        with col4:
+            st.metric("BPM", track_features["bpm"])
+            st.metric("Energy", track_features["energy"])
+
+def render_similar_tracks(slot, similar_tracks: list) -> None:
+    """Similar Tracks tab"""
+    with slot.container():
+        for track in similar_tracks:
+            with st.container():
+                col5, col6 = st.columns([1, 3])
+                with col5:
+                    st.image(track['thumbnail'])
+                with col6:
+                    st.markdown(f"#### [{track['title']}]({track['url']})")
+                    st.caption(f"Channel: {track['channel']}")
+                    st.caption(f"👀 {track.get('views', 0):,} views | 👍 {track.get('likes', 0):,} likes")
+
+def render_seo(slot, genre: str, track_features: dict) -> None:
+    """YouTube SEO tab, including the custom keyword analyzer"""
+    with slot.container():
+        seo_data = generate_seo_tags(genre, track_features)
+        
+        st.subheader("📈 YouTube Optimization")
         
-        # Analyze audio with error handling
-        try:
-            audio_features = analyze_audio("temp.wav")
-            logger.info("Audio analysis completed successfully")
-        except Exception as e:
-            logger.error(f"Audio analysis failed: {str(e)}")
-            st.warning("Audio analysis encountered issues. Using default values.")
-            audio_features = {
-                "bpm": "128",
-                "key": "C Major",
-                "energy": "Medium",
-                "genre": "House"
-            }
+        st.write("### 🎯 Title Suggestions")
+        for title in seo_data["title_suggestions"]:
+            st.info(title)
         
-        # Combine with file info
-        track_features = {
-            "name": file.name.replace(".wav", ""),
-            **audio_features
-        }
+        st.write("### 🔑 Keywords")
+        st.code(", ".join(seo_data["keywords"]))
         
-        return track_features
+        st.write("### 📝 Description Template")
+        st.text_area("Copy this description:", value=seo_data["description"], height=300)
         
-    except Exception as e:
-        logger.error(f"Error processing audio file: {str(e)}")
-        st.error("Error processing file. Please try again.")
-        raise
-    finally:
-        if os.path.exists("temp.wav"):
-            os.remove("temp.wav")
+        col7, col8 = st.columns(2)
+        with col7:
+            st.write("### ⏰ Best Upload Times")
+            for time in seo_data["upload_times"]:
+                st.write(f"• {time}")
+        with col8:
+            st.write("### 🖼️ Thumbnail Tips")
+            for tip in seo_data["thumbnail_tips"]:
+                st.write(f"• {tip}")
+        
+        # Add real-time keyword analyzer
+        st.write("### 🔍 Analyze Custom Keywords")
+        custom_keyword = st.text_input("Enter keyword to analyze:", 
+                                     help="Type a keyword and see real-time metrics")
+        
+        if custom_keyword:
+            suggestions = get_keyword_suggestions(custom_keyword)
+            if suggestions:
+                st.caption("Related: " + " · ".join(suggestions))
+            with st.spinner("Analyzing keyword..."):
+                keyword_metrics = analyze_keyword_realtime(custom_keyword)
+                
+                if keyword_metrics:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        score_color = "green" if keyword_metrics['score'] > 70 else "orange" if keyword_metrics['score'] > 40 else "red"
+                        st.markdown(f"Score: <span style='color:{score_color}'>{keyword_metrics['score']:.1f}</span>", 
+                                  unsafe_allow_html=True)
+                    with col2:
+                        st.write(f"Competition: {keyword_metrics['competition']}")
+                    with col3:
+                        st.write(f"Monthly Searches: {keyword_metrics['monthly_searches']}")
+
+def render_keyword_rankings(slot, keyword_data: dict) -> None:
+    """Keyword Rankings tab"""
+    with slot.container():
+        st.subheader("🎯 Keyword Analysis")
+        
+        # Display keyword rankings
+        for keyword, stats in keyword_data.items():
+            with st.container():
+                col9, col10, col11 = st.columns([3, 1, 1])
+                with col9:
+                    st.markdown(f"### `{keyword}`")
+                with col10:
+                    score_color = "green" if stats['score'] > 0.7 else "orange" if stats['score'] > 0.5 else "red"
+                    st.markdown(f"Score: <span style='color:{score_color}'>{stats['score']:.2f}</span>", unsafe_allow_html=True)
+                with col11:
+                    competition_color = "green" if stats['competition'] == "Low" else "orange" if stats['competition'] == "Medium" else "red"
+                    st.markdown(f"Competition: <span style='color:{competition_color}'>{stats['competition']}</span>", unsafe_allow_html=True)
+                st.caption(f"Monthly Searches: {stats['monthly_searches']}")
+                st.divider()
+
+def run_track_pipeline(file, profile: str, slots: dict) -> None:
+    """Run analysis in a worker process and YouTube lookups in threads, rendering each as it lands"""
+    logger.info(f"Processing file: {file.name} ({profile} profile)")
+    name, suffix = os.path.splitext(file.name)
+    suffix = suffix.lower()
+    data = file.getbuffer()
+    version = f"{ANALYZER_VERSION}:{profile}"
+    cache_key = analysis_cache.make_key(data, version)
+
+    final_features = analysis_cache.get(cache_key)
+    current = None
+    results = {}
+    pending = {}
+
+    with session_thread_pool() as threads:
+        def start_lookups(track_features: dict) -> None:
+            """Genre-dependent YouTube work for the final analysis"""
+            genre, bpm = track_features["genre"], track_features["bpm"]
+            for task, func in (("similar", find_similar_tracks), ("keywords", analyze_keywords)):
+                key = (task, genre, bpm)
+                if key not in results and key not in pending.values():
+                    pending[threads.submit(func, genre, track_features)] = key
+
+        def show(track_features: dict, preliminary: bool) -> None:
+            nonlocal current
+            current = {"name": name, **track_features}
+            render_analysis(slots["analysis"], current, preliminary)
+            if preliminary:
+                # The preview's genre/BPM often differ from the final ones, so only show what costs no quota
+                for task, func in (("similar", find_similar_tracks), ("keywords", analyze_keywords)):
+                    value = func(current["genre"], current, cache_only=True)
+                    if value:
+                        render_lookup(task, value)
+                return
+            start_lookups(current)
+            # Re-render lookups already finished for this genre/BPM
+            for (task, genre, bpm), value in results.items():
+                if (genre, bpm) == (current["genre"], current["bpm"]):
+                    render_lookup(task, value)
+
+        def render_seo_once() -> None:
+            """SEO tab for the final features; its widgets can only be drawn once per script run"""
+            nonlocal seo_shown
+            # A failed analysis may still be replaced by a fingerprint match, so wait for that first
+            if seo_shown or final_features is None or (not analyzed and ("fingerprint",) in pending.values()):
+                return
+            render_seo(slots["seo"], current["genre"], current)
+            seo_shown = True
+
+        def render_lookup(task: str, value) -> None:
+            if task == "similar":
+                render_similar_tracks(slots["similar"], value)
+            else:
+                render_keyword_rankings(slots["keywords"], value)
+
+        fingerprint = None
+        analyzed = False
+        seo_shown = False
+        if final_features:
+            logger.info("Returning cached audio analysis")
+            show(final_features, preliminary=False)
+            render_seo_once()
+        else:
+            pool = get_process_pool()
+            # Workers read the upload from one temporary file instead of each getting a pickled copy
+            path = write_temporary_audio(data, suffix)
+            try:
+                # Submitted first so a quick genre estimate lands early even on a single worker
+                if profile != PREVIEW_PROFILE:
+                    pending[pool.submit(analyze_audio, path, profile=PREVIEW_PROFILE, suffix=suffix)] = ("preview",)
+                # Alongside the preview: a re-encoded or trimmed copy of an earlier upload makes the full analysis unnecessary
+                pending[pool.submit(fingerprint_audio, path, suffix)] = ("fingerprint",)
+                analysis = pool.submit(analyze_audio, path, profile=profile, suffix=suffix)
+                pending[analysis] = ("analysis",)
+            finally:
+                # Including an analysis a fingerprint match makes redundant, which may already be running
+                remove_when_done(path, list(pending))
+
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future, None)
+                if key is None:
+                    # The full analysis, dropped after a fingerprint match in the same round
+                    continue
+                task = key[0]
+
+                if task == "preview":
+                    try:
+                        preview = future.result()
+                    except Exception as e:
+                        logger.warning(f"Preview analysis failed: {str(e)}")
+                        continue
+                    if final_features is None:
+                        show(preview, preliminary=True)
+
+                elif task == "fingerprint":
+                    try:
+                        fingerprint = future.result()
+                    except Exception as e:
+                        logger.warning(f"Fingerprinting failed: {str(e)}")
+                        continue
+                    if analyzed:
+                        fingerprint_index.add(cache_key, version, fingerprint)
+                        continue
+                    matched = lookup_analysis(fingerprint, version, cache_key)
+                    if matched:
+                        final_features = matched
+                        logger.info("Reusing the analysis of an earlier upload with the same audio")
+                        # A worker that already started it finishes in the background; nothing waits on it
+                        analysis.cancel()
+                        pending.pop(analysis, None)
+                        show(final_features, preliminary=False)
+
+                elif task == "analysis":
+                    try:
+                        final_features = future.result()
+                        analysis_cache.set(cache_key, final_features)
+                        analyzed = True
+                        if fingerprint is not None:
+                            fingerprint_index.add(cache_key, version, fingerprint)
+                        logger.info("Audio analysis completed successfully")
+                    except Exception as e:
+                        logger.error(f"Audio analysis failed: {str(e)}")
+                        st.warning("Audio analysis encountered issues. Using default values.")
+                        final_features = DEFAULT_FEATURES
+                    show(final_features, preliminary=False)
+
+                else:
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        logger.error(f"{task} lookup failed: {str(e)}")
+                        if task == "keywords":
+                            st.warning("Using cached keyword data due to API limitations")
+                        value = [] if task == "similar" else {}
+                    results[key] = value
+                    if current and key[1:] == (current["genre"], current["bpm"]):
+                        render_lookup(task, value)
+            render_seo_once()
 
 def main():
     st.set_page_config(page_title="OTW Analyzer", page_icon="🎵", layout="wide")
+    if os.environ.get(CACHE_WARMER_ENV):
+        start_cache_warmer()
     
     col1, col2 = st.columns([2, 1])
     
@@ -57,114 +275,26 @@ def main():
         st.title("🎵 OTW Analyzer")
         st.subheader("EDM Track Analysis & YouTube Optimization")
         
-        uploaded_file = st.file_uploader("Drop your track here", type=['wav'])
+        uploaded_file = st.file_uploader("Drop your track here", type=[ext.lstrip('.') for ext in AUDIO_EXTENSIONS])
+        profile = st.radio("Analysis quality", list(PROFILES), index=list(PROFILES).index(DEFAULT_PROFILE),
+                           horizontal=True, help="Fast gives a quick estimate, full is the most accurate")
         
         if uploaded_file:
-            with st.spinner("Analyzing track..."):
-                track_features = process_audio_file(uploaded_file)
-                genre = track_features["genre"]
-                
-                # Add API quota warning
-                st.info("Note: Some features might use cached data due to API limitations")
-                
-                # Analyze keywords with quota handling
-                with st.spinner("Analyzing YouTube keywords..."):
-                    try:
-                        keyword_data = analyze_keywords(genre, track_features)
-                    except Exception as e:
-                        st.warning("Using cached keyword data due to API limitations")
-                        keyword_data = get_fallback_data(genre)
-                
-                # Create tabs for different analyses
-                tab1, tab2, tab3, tab4 = st.tabs(["Analysis", "Similar Tracks", "YouTube SEO", "Keyword Rankings"])
-                
-                with tab1:
-                    st.success("Analysis complete!")
-                    col3, col4 = st.columns(2)
-                    with col3:
-                        st.metric("Genre", genre)
-                        st.metric("Key", track_features["key"])
-                    with col4:
-                        st.metric("BPM", track_features["bpm"])
-                        st.metric("Energy", track_features["energy"])
-                
-                with tab2:
-                    similar_tracks = find_similar_tracks(genre, track_features)
-                    for track in similar_tracks:
-                        with st.container():
-                            col5, col6 = st.columns([1, 3])
-                            with col5:
-                                st.image(track['thumbnail'])
-                            with col6:
-                                st.markdown(f"#### [{track['title']}]({track['url']})")
-                                st.caption(f"Channel: {track['channel']}")
-                                st.caption(f"👀 {track['views']:,} views | 👍 {track['likes']:,} likes")
-                
-                with tab3:
-                    seo_data = generate_seo_tags(genre, track_features)
-                    
-                    st.subheader("📈 YouTube Optimization")
-                    
-                    st.write("### 🎯 Title Suggestions")
-                    for title in seo_data["title_suggestions"]:
-                        st.info(title)
-                    
-                    st.write("### 🔑 Keywords")
-                    st.code(", ".join(seo_data["keywords"]))
-                    
-                    st.write("### 📝 Description Template")
-                    st.text_area("Copy this description:", value=seo_data["description"], height=300)
-                    
-                    col7, col8 = st.columns(2)
-                    with col7:
-                        st.write("### ⏰ Best Upload Times")
-                        for time in seo_data["upload_times"]:
-                            st.write(f"• {time}")
-                    with col8:
-                        st.write("### 🖼️ Thumbnail Tips")
-                        for tip in seo_data["thumbnail_tips"]:
-                            st.write(f"• {tip}")
-                    
-                    # Add real-time keyword analyzer
-                    st.write("### 🔍 Analyze Custom Keywords")
-                    custom_keyword = st.text_input("Enter keyword to analyze:", 
-                                                 help="Type a keyword and see real-time metrics")
-                    
-                    if custom_keyword:
-                        with st.spinner("Analyzing keyword..."):
-                            keyword_metrics = analyze_keyword_realtime(custom_keyword)
-                            
-                            if keyword_metrics:
-                                col1, col2, col3 = st.columns(3)
-                                with col1:
-                                    score_color = "green" if keyword_metrics['score'] > 70 else "orange" if keyword_metrics['score'] > 40 else "red"
-                                    st.markdown(f"Score: <span style='color:{score_color}'>{keyword_metrics['score']:.1f}</span>", 
-                                              unsafe_allow_html=True)
-                                with col2:
-                                    st.write(f"Competition: {keyword_metrics['competition']}")
-                                with col3:
-                                    st.write(f"Monthly Searches: {keyword_metrics['monthly_searches']}")
-                
-                with tab4:
-                    st.subheader("🎯 Keyword Analysis")
-                    
-                    # Display keyword rankings
-                    for keyword, stats in keyword_data.items():
-                        with st.container():
-                            col9, col10, col11 = st.columns([3, 1, 1])
-                            with col9:
-                                st.markdown(f"### `{keyword}`")
-                            with col10:
-                                score_color = "green" if stats['score'] > 0.7 else "orange" if stats['score'] > 0.5 else "red"
-                                st.markdown(f"Score: <span style='color:{score_color}'>{stats['score']:.2f}</span>", unsafe_allow_html=True)
-                            with col11:
-                                competition_color = "green" if stats['competition'] == "Low" else "orange" if stats['competition'] == "Medium" else "red"
-                                st.markdown(f"Competition: <span style='color:{competition_color}'>{stats['competition']}</span>", unsafe_allow_html=True)
-                            st.caption(f"Monthly Searches: {stats['monthly_searches']}")
-                            st.divider()
+            # Add API quota warning
+            st.info("Note: Some features might use cached data due to API limitations")
+            
+            # Create tabs up front; each fills in as soon as its data is ready
+            tab1, tab2, tab3, tab4 = st.tabs(["Analysis", "Similar Tracks", "YouTube SEO", "Keyword Rankings"])
+            slots = {}
+            for name, tab in (("analysis", tab1), ("similar", tab2), ("seo", tab3), ("keywords", tab4)):
+                with tab:
+                    slots[name] = st.empty()
+                    slots[name].caption("Loading...")
+            
+            run_track_pipeline(uploaded_file, profile, slots)
     
     with col2:
-        st.info("💡 Pro tip: Use high-quality WAV files for best results")
+        st.info("💡 Pro tip: FLAC uploads faster than WAV with identical results")
         st.info("✨ Upload during recommended times for better reach")
         st.info("🎯 Focus on keywords with high scores and low competition")
 
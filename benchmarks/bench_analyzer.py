@@ -0,0 +1,210 @@
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+import librosa
+from typing import Callable, Dict, List, Tuple
+from benchmarks.fixtures import Fixture, generate_fixtures
+from src.Audio.analyzer import (ANALYZER_VERSION, analyze_audio, calculate_energy, describe_track, detect_genre,
+                                load_window)
+from src.Audio.features import extract_features, full_band_summary
+from src.Audio.key_detection import PITCH_CLASSES, estimate_key
+from src.Audio.profiles import DEFAULT_PROFILE, PROFILES, get_profile
+from src.Audio.window import select_window
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+DEFAULT_LENGTHS = [30.0, 120.0]
+DEFAULT_TRACKS = [(124, "A Minor"), (128, "F Major"), (132, "D Minor")]
+DEFAULT_NOISE_LEVELS = [0.01, 0.05, 0.2]
+
+def measure(func: Callable, *args, **kwargs) -> Tuple[object, Dict]:
+    """Run one stage and record its wall time and peak traced memory"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, {"wall_time": elapsed, "peak_mb": peak / 2 ** 20}
+
+def key_score(detected: str, expected: str) -> float:
+    """MIREX-style key score: exact 1.0, fifth 0.5, relative 0.3, parallel 0.2"""
+    if detected == expected:
+        return 1.0
+    d_pc, d_mode = detected.split()
+    e_pc, e_mode = expected.split()
+    d_idx, e_idx = PITCH_CLASSES.index(d_pc), PITCH_CLASSES.index(e_pc)
+    interval = (d_idx - e_idx) % 12
+
+    if d_mode == e_mode and interval in (5, 7):
+        return 0.5
+    if e_mode == "Major" and d_mode == "Minor" and interval == 9:
+        return 0.3
+    if e_mode == "Minor" and d_mode == "Major" and interval == 3:
+        return 0.3
+    if d_mode != e_mode and interval == 0:
+        return 0.2
+    return 0.0
+
+def bench_fixture(fixture: Fixture, profile_name: str) -> Dict:
+    """Time each analysis stage on one fixture and score the result against ground truth"""
+    profile = get_profile(profile_name)
+    stages = {}
+
+    offset = 0.0
+    if profile.select_window and profile.duration:
+        offset, stages["window"] = measure(select_window, fixture.path, profile.duration)
+    (y, sr, native, native_sr), stages["load"] = measure(
+        load_window, fixture.path, offset, profile.duration, profile.sr
+    )
+    features, stages["features"] = measure(
+        extract_features, y, sr, n_fft=profile.n_fft, hop_length=profile.hop_length, hpss=profile.hpss
+    )
+    tempo, stages["tempo"] = measure(
+        lambda: float(librosa.feature.tempo(onset_envelope=features.onset_env, sr=sr, hop_length=features.hop_length)[0])
+    )
+    summary, stages["full_band"] = measure(full_band_summary, features.summarize(), native, native_sr)
+    _, stages["key"] = measure(estimate_key, summary.chroma_mean)
+    _, stages["energy"] = measure(calculate_energy, summary)
+    _, stages["genre"] = measure(detect_genre, tempo, summary)
+    _, stages["analyze_audio"] = measure(analyze_audio, fixture.path, profile=profile_name)
+    _, stages["analyze_audio_streaming"] = measure(analyze_audio, fixture.path, streaming=True, profile=profile_name)
+
+    result = describe_track(tempo, summary)
+    accuracy = {"energy": result["energy"], "genre": result["genre"]}
+    if fixture.bpm is not None:
+        accuracy["bpm"] = int(result["bpm"])
+        accuracy["bpm_error"] = abs(int(result["bpm"]) - fixture.bpm)
+        accuracy["bpm_correct"] = accuracy["bpm_error"] <= 1
+    if fixture.key is not None:
+        accuracy["key"] = result["key"]
+        accuracy["key_score"] = key_score(result["key"], fixture.key)
+
+    return {"fixture": fixture.name, "duration": fixture.duration, "profile": profile_name,
+            "stages": stages, "accuracy": accuracy}
+
+def summarize_accuracy(results: List[Dict]) -> Dict:
+    """Aggregate BPM and key accuracy per profile"""
+    summary = {}
+    for profile in sorted({r["profile"] for r in results}):
+        rows = [r["accuracy"] for r in results if r["profile"] == profile]
+        bpm_rows = [a for a in rows if "bpm_correct" in a]
+        key_rows = [a for a in rows if "key_score" in a]
+        summary[profile] = {
+            "bpm_accuracy": sum(a["bpm_correct"] for a in bpm_rows) / len(bpm_rows) if bpm_rows else None,
+            "key_score": sum(a["key_score"] for a in key_rows) / len(key_rows) if key_rows else None,
+        }
+    return summary
+
+def profile_disagreements(results: List[Dict]) -> List[str]:
+    """Fixtures whose energy or genre label changes between profiles
+
+    Genre follows the detected tempo, so it is only compared on fixtures with a real beat.
+    """
+    disagreements = []
+    for fixture in dict.fromkeys(r["fixture"] for r in results):
+        runs = {r["profile"]: r["accuracy"] for r in results if r["fixture"] == fixture}
+        fields = ["energy", "genre"] if any("bpm" in acc for acc in runs.values()) else ["energy"]
+        for field in fields:
+            labels = {profile: acc[field] for profile, acc in runs.items()}
+            if len(set(labels.values())) > 1:
+                disagreements.append(f"{fixture} {field}: " + ", ".join(f"{p}={v}" for p, v in labels.items()))
+    return disagreements
+
+def compare(current: Dict, baseline: Dict, time_tolerance: float, memory_tolerance: float) -> List[str]:
+    """List speed, memory and accuracy regressions relative to a saved baseline"""
+    regressions = []
+    old_runs = {(r["fixture"], r["profile"]): r for r in baseline["results"]}
+
+    for run in current["results"]:
+        old = old_runs.get((run["fixture"], run["profile"]))
+        if not old:
+            continue
+        label = f"{run['fixture']} [{run['profile']}]"
+
+        for stage, metrics in run["stages"].items():
+            old_metrics = old["stages"].get(stage)
+            if not old_metrics:
+                continue
+            # Absolute slack keeps millisecond-scale stages from flagging on noise
+            if metrics["wall_time"] > old_metrics["wall_time"] * (1 + time_tolerance) + 0.05:
+                regressions.append(f"{label} {stage}: {old_metrics['wall_time']:.3f}s -> {metrics['wall_time']:.3f}s")
+            if metrics["peak_mb"] > old_metrics["peak_mb"] * (1 + memory_tolerance) + 1.0:
+                regressions.append(f"{label} {stage}: {old_metrics['peak_mb']:.1f}MB -> {metrics['peak_mb']:.1f}MB")
+
+        acc, old_acc = run["accuracy"], old["accuracy"]
+        if old_acc.get("bpm_correct") and not acc.get("bpm_correct"):
+            regressions.append(f"{label} bpm: {old_acc['bpm']} -> {acc['bpm']}")
+        if acc.get("key_score", 1.0) < old_acc.get("key_score", 0.0):
+            regressions.append(f"{label} key: {old_acc['key']} -> {acc['key']}")
+        for field in ("energy", "genre"):
+            if acc[field] != old_acc[field]:
+                regressions.append(f"{label} {field}: {old_acc[field]} -> {acc[field]}")
+
+    return regressions
+
+def print_report(report: Dict) -> None:
+    print(f"{'fixture':<32}{'profile':<10}{'stage':<26}{'time (s)':>10}{'peak (MB)':>12}")
+    for run in report["results"]:
+        for stage, metrics in run["stages"].items():
+            print(f"{run['fixture']:<32}{run['profile']:<10}{stage:<26}"
+                  f"{metrics['wall_time']:>10.3f}{metrics['peak_mb']:>12.1f}")
+    print()
+    for profile, acc in report["accuracy"].items():
+        bpm = f"{acc['bpm_accuracy']:.0%}" if acc["bpm_accuracy"] is not None else "n/a"
+        key = f"{acc['key_score']:.2f}" if acc["key_score"] is not None else "n/a"
+        print(f"{profile}: BPM accuracy {bpm} | key score {key}")
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark analyzer speed, memory and accuracy on synthetic audio")
+    parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=[DEFAULT_PROFILE])
+    parser.add_argument('--lengths', nargs='+', type=float, default=DEFAULT_LENGTHS, help="Fixture lengths in seconds")
+    parser.add_argument('--save', help="Write results to this JSON file (e.g. a new baseline)")
+    parser.add_argument('--baseline', help="Compare against a previously saved results file")
+    parser.add_argument('--time-tolerance', type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help="Allowed relative memory growth")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        fixtures = generate_fixtures(fixture_dir, args.lengths, DEFAULT_TRACKS, DEFAULT_NOISE_LEVELS)
+        # Warm up numba-compiled librosa kernels so the first fixture isn't penalized
+        analyze_audio(fixtures[0].path, profile=args.profiles[0])
+        results = [bench_fixture(fixture, profile) for profile in args.profiles for fixture in fixtures]
+
+    report = {"analyzer_version": ANALYZER_VERSION, "results": results, "accuracy": summarize_accuracy(results)}
+    print_report(report)
+
+    status = 0
+    disagreements = profile_disagreements(results)
+    if disagreements:
+        print(f"\n{len(disagreements)} label(s) differ between profiles:")
+        for line in disagreements:
+            print(f"  - {line}")
+        status = 1
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.time_tolerance, args.memory_tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\nNo regressions against {args.baseline}")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import os
+import numpy as np
+import soundfile as sf
+from dataclasses import dataclass
+from typing import List, Optional
+from src.Audio.key_detection import PITCH_CLASSES
+
+SAMPLE_RATE = 44100
+
+# Chord roots (semitones above the tonic) and qualities; cadences make the tonic unambiguous
+PROGRESSIONS = {
+    "Major": [(0, "maj"), (5, "maj"), (7, "maj"), (0, "maj")],
+    "Minor": [(0, "min"), (5, "min"), (7, "maj"), (0, "min")],
+}
+TRIADS = {"maj": [0, 4, 7], "min": [0, 3, 7]}
+
+@dataclass
+class Fixture:
+    """Synthetic track with known ground truth"""
+    name: str
+    path: str
+    duration: float
+    bpm: Optional[float] = None
+    key: Optional[str] = None
+    noise_level: Optional[float] = None
+
+def midi_to_hz(note: float) -> float:
+    return 440.0 * 2 ** ((note - 69) / 12)
+
+def click_track(bpm: float, duration: float, sr: int, rng: np.random.Generator) -> np.ndarray:
+    """Kick on every beat and a noise hat on every off-beat"""
+    n = int(duration * sr)
+    y = np.zeros(n)
+    beat = 60.0 / bpm
+
+    kick_t = np.arange(int(0.15 * sr)) / sr
+    kick = np.sin(2 * np.pi * 55 * kick_t) * np.exp(-kick_t * 30) * 0.6
+    hat = rng.standard_normal(int(0.02 * sr)) * np.exp(-np.arange(int(0.02 * sr)) / (0.004 * sr)) * 0.3
+
+    for i, start in enumerate(np.arange(0, duration, beat / 2)):
+        sound = kick if i % 2 == 0 else hat
+        idx = int(start * sr)
+        end = min(idx + len(sound), n)
+        y[idx:end] += sound[:end - idx]
+    return y
+
+def chord_progression(key: str, bpm: float, duration: float, sr: int) -> np.ndarray:
+    """Sustained triads plus bass root, one chord per bar, cycling through a cadence"""
+    tonic_name, mode = key.split()
+    tonic = 60 + PITCH_CLASSES.index(tonic_name)
+    bar = 4 * 60.0 / bpm
+    n = int(duration * sr)
+    y = np.zeros(n)
+
+    bar_samples = int(bar * sr)
+    t = np.arange(bar_samples) / sr
+    envelope = np.minimum(1.0, t / 0.02) * np.minimum(1.0, (bar - t) / 0.05)
+
+    for i, start in enumerate(range(0, n, bar_samples)):
+        root, quality = PROGRESSIONS[mode][i % len(PROGRESSIONS[mode])]
+        notes = [tonic + root + interval for interval in TRIADS[quality]] + [tonic + root - 24]
+        chord = np.zeros(bar_samples)
+        for note in notes:
+            for harmonic in range(1, 4):
+                chord += np.sin(2 * np.pi * midi_to_hz(note) * harmonic * t) / harmonic
+        length = min(bar_samples, n - start)
+        y[start:start + length] += (chord * envelope)[:length] * 0.08
+    return y
+
+def noise_track(level: float, duration: float, sr: int, rng: np.random.Generator) -> np.ndarray:
+    """White noise at a fixed RMS level"""
+    return rng.standard_normal(int(duration * sr)) * level
+
+def _write(path: str, y: np.ndarray, sr: int) -> None:
+    y = np.clip(y, -1.0, 1.0)
+    sf.write(path, y.astype(np.float32), sr, subtype='PCM_16')
+
+def generate_fixtures(out_dir: str, lengths: List[float], tracks: List[tuple],
+                      noise_levels: List[float], sr: int = SAMPLE_RATE, seed: int = 0) -> List[Fixture]:
+    """Write deterministic WAV fixtures and return their ground truth"""
+    os.makedirs(out_dir, exist_ok=True)
+    fixtures = []
+
+    for duration in lengths:
+        for bpm, key in tracks:
+            rng = np.random.default_rng(seed)
+            name = f"{key.replace(' ', '_').replace('#', 's')}_{bpm}bpm_{int(duration)}s"
+            path = os.path.join(out_dir, f"{name}.wav")
+            y = click_track(bpm, duration, sr, rng) + chord_progression(key, bpm, duration, sr)
+            _write(path, y, sr)
+            fixtures.append(Fixture(name=name, path=path, duration=duration, bpm=bpm, key=key))
+
+        for level in noise_levels:
+            rng = np.random.default_rng(seed)
+            name = f"noise_{level}_{int(duration)}s"
+            path = os.path.join(out_dir, f"{name}.wav")
+            _write(path, noise_track(level, duration, sr, rng), sr)
+            fixtures.append(Fixture(name=name, path=path, duration=duration, noise_level=level))
+
+    return fixtures
@@ -0,0 +1,171 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+from benchmarks.fixtures import generate_fixtures
+from src.api.fake_youtube import FakeAPIConfig, enable_fake_api
+from src.api.keyword_analyzer import analyze_keywords
+from src.api.youtube import analyze_keyword_realtime, find_similar_tracks
+from src.Audio.analyzer import ANALYZER_VERSION, analyze_audio
+from src.Audio.fingerprint import fingerprint_audio, fingerprint_index, lookup_analysis
+from src.Audio.profiles import PROFILES
+from src.utlis.analysis_cache import analysis_cache
+from src.utlis.api_key_manager import YouTubeKeyManager, set_key_manager
+from src.utlis.executor import get_process_pool
+from src.utlis.telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACKS = [(124, "A Minor"), (126, "C Major"), (128, "F Major"), (130, "G Minor"), (132, "D Minor")]
+STAGES = ["analysis", "similar", "keywords", "realtime", "total"]
+
+def timed(func: Callable, *args, **kwargs) -> Tuple[object, float]:
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def run_flow(path: str, profile: str) -> Dict[str, float]:
+    """One upload -> analyze -> similar tracks + keywords -> keyword lookup, as app.py runs it"""
+    start = time.perf_counter()
+    timings = {}
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    version = f"{ANALYZER_VERSION}:{profile}"
+    cache_key = analysis_cache.make_key(data, version)
+    features = analysis_cache.get(cache_key)
+    if features is None:
+        # Fingerprint alongside the analysis: re-encoded or trimmed copies reuse an earlier one and skip it
+        pool = get_process_pool()
+        fingerprinting = pool.submit(fingerprint_audio, data)
+        analysis = pool.submit(analyze_audio, data, profile=profile)
+        fingerprint = fingerprinting.result()
+        features = lookup_analysis(fingerprint, version, cache_key)
+        if features is not None:
+            analysis.cancel()
+        else:
+            features = analysis.result()
+            analysis_cache.set(cache_key, features)
+            fingerprint_index.add(cache_key, version, fingerprint)
+    timings["analysis"] = time.perf_counter() - start
+
+    # The app runs both genre lookups concurrently once the genre is known
+    genre = features["genre"]
+    with ThreadPoolExecutor(max_workers=2) as lookups:
+        similar = lookups.submit(timed, find_similar_tracks, genre, features)
+        keywords = lookups.submit(timed, analyze_keywords, genre, features)
+        _, timings["similar"] = similar.result()
+        ranked, timings["keywords"] = keywords.result()
+
+    keyword = next(iter(ranked), f"{genre.lower()} {features['bpm']} bpm")
+    _, timings["realtime"] = timed(analyze_keyword_realtime, keyword)
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+def run_session(session: int, paths: List[str], rounds: int, profile: str, results: List[Dict],
+                errors: List[str], lock: threading.Lock) -> None:
+    """A session uploads `rounds` tracks one after another"""
+    for i in range(rounds):
+        path = paths[(session + i) % len(paths)]
+        try:
+            timings = run_flow(path, profile)
+        except Exception as e:
+            with lock:
+                errors.append(f"session {session}: {type(e).__name__}: {str(e)}")
+            continue
+        with lock:
+            results.append(timings)
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(max(values))}
+
+def prepare_workdir(workdir: str, keys: int) -> None:
+    """Sandbox caches and quota usage for the run, with fake keys for the scheduler"""
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    set_key_manager(YouTubeKeyManager([f"fake-key-{i}" for i in range(keys)]))
+
+def print_report(report: Dict) -> None:
+    print(f"{report['flows']} flows from {report['sessions']} sessions in {report['wall_time']:.2f}s "
+          f"({report['throughput']:.2f} flows/s, {len(report['errors'])} failed)")
+    print()
+    print(f"{'stage':<12}{'p50 (s)':>10}{'p95 (s)':>10}{'p99 (s)':>10}{'max (s)':>10}")
+    for stage, stats in report["latency"].items():
+        print(f"{stage:<12}{stats['p50']:>10.3f}{stats['p95']:>10.3f}{stats['p99']:>10.3f}{stats['max']:>10.3f}")
+    print()
+    print(f"API round trips: {report['api']['round_trips']} | requests: "
+          + ", ".join(f"{endpoint}={n}" for endpoint, n in report["api"]["requests"].items()))
+    for row in report["api"]["methods"]:
+        errors = ", ".join(f"{name}={int(n)}" for name, n in row["errors"].items()) or "none"
+        print(f"  {row['method']:<14} calls={int(row['calls'])} units={int(row['units'])} errors: {errors}")
+    for row in report["cache"]:
+        ratio = f"{row['hit_ratio']:.0%}" if row["hit_ratio"] is not None else "n/a"
+        print(f"  cache {row['namespace']:<12} hit={int(row['hit'])} stale={int(row['stale'])} "
+              f"miss={int(row['miss'])} ({ratio})")
+    for line in report["errors"][:10]:
+        print(f"  ! {line}")
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate concurrent app sessions against the local YouTube API fake")
+    parser.add_argument('--sessions', type=int, default=8, help="Concurrent sessions")
+    parser.add_argument('--rounds', type=int, default=3, help="Tracks uploaded per session")
+    parser.add_argument('--profile', choices=list(PROFILES), default="fast")
+    parser.add_argument('--length', type=float, default=30.0, help="Fixture length in seconds")
+    parser.add_argument('--latency', type=float, default=0.1, help="Fake API latency per round trip (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--quota-error-rate', type=float, default=0.0)
+    parser.add_argument('--recordings', help="Directory of recorded API responses to replay")
+    parser.add_argument('--keys', type=int, default=2, help="Fake API keys to schedule across")
+    parser.add_argument('--workdir', help="Reuse caches from a previous run (default: fresh temp dir)")
+    parser.add_argument('--save', help="Write the report to this JSON file")
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    save = os.path.abspath(args.save) if args.save else None
+    recordings = os.path.abspath(args.recordings) if args.recordings else None
+    prepare_workdir(args.workdir or tempfile.mkdtemp(prefix="load_harness_"), args.keys)
+    fake = enable_fake_api(FakeAPIConfig(latency=args.latency, error_rate=args.error_rate,
+                                         quota_error_rate=args.quota_error_rate, recordings_dir=recordings, seed=0))
+
+    fixtures = generate_fixtures("fixtures", [args.length], DEFAULT_TRACKS, [])
+    paths = [fixture.path for fixture in fixtures]
+    # Start worker processes before the clock so spawn cost isn't charged to the first flows
+    get_process_pool().submit(int).result()
+
+    results, errors, lock = [], [], threading.Lock()
+    start = time.perf_counter()
+    sessions = [threading.Thread(target=run_session, args=(i, paths, args.rounds, args.profile, results, errors, lock))
+                for i in range(args.sessions)]
+    for session in sessions:
+        session.start()
+    for session in sessions:
+        session.join()
+    wall_time = time.perf_counter() - start
+
+    report = {
+        "sessions": args.sessions,
+        "flows": len(results),
+        "wall_time": wall_time,
+        "throughput": len(results) / wall_time,
+        "latency": {stage: percentiles([r[stage] for r in results]) for stage in STAGES} if results else {},
+        "api": {"round_trips": fake.round_trips, "requests": dict(fake.calls), "methods": telemetry.api_summary()},
+        "cache": telemetry.cache_summary(),
+        "errors": errors,
+    }
+    print_report(report)
+
+    if save:
+        with open(save, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0 if results else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import streamlit as st
+from src.utlis.api_key_manager import get_key_manager
+from src.utlis.telemetry import telemetry
+
+def format_seconds(value) -> str:
+    return f"{value * 1000:.0f} ms" if value is not None else "-"
+
+def main():
+    st.set_page_config(page_title="Admin - API Telemetry", page_icon="📊", layout="wide")
+    st.title("📊 API Telemetry")
+    st.caption("Counters cover this server process since it started.")
+
+    st.subheader("YouTube API calls")
+    api_rows = telemetry.api_summary()
+    if api_rows:
+        st.dataframe([{
+            "method": row["method"],
+            "calls": int(row["calls"]),
+            "errors": ", ".join(f"{name}: {int(n)}" for name, n in row["errors"].items()) or "-",
+            "units": int(row["units"]),
+            "p50": format_seconds(row["p50_seconds"]),
+            "p95": format_seconds(row["p95_seconds"]),
+            "p99": format_seconds(row["p99_seconds"]),
+        } for row in api_rows], use_container_width=True)
+    else:
+        st.info("No API calls recorded yet")
+
+    st.subheader("Cache")
+    cache_rows = telemetry.cache_summary()
+    if cache_rows:
+        st.dataframe([{
+            "namespace": row["namespace"],
+            **{k: int(row[k]) for k in ("hit", "stale", "miss")},
+            "hit ratio": f"{row['hit_ratio']:.0%}" if row["hit_ratio"] is not None else "-",
+        } for row in cache_rows], use_container_width=True)
+    else:
+        st.info("No cache lookups recorded yet")
+
+    st.subheader("Quota")
+    st.dataframe(get_key_manager().budget_summary(), use_container_width=True)
+
+    st.subheader("Prometheus")
+    metrics = telemetry.to_prometheus()
+    if st.button("Write metrics file"):
+        telemetry.export()
+        st.success(f"Wrote {telemetry.metrics_file}")
+    st.download_button("Download metrics", metrics, file_name="metrics.prom", mime="text/plain")
+    with st.expander("Raw metrics"):
+        st.code(metrics, language="text")
+
+if __name__ == "__main__":
+    main()
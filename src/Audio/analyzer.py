@@ -1,87 +1,107 @@
 import librosa
-import numpy as np
 import logging
+import numpy as np
+from typing import BinaryIO, Optional, Tuple, Union
+from src.Audio.decode import AudioSource, open_audio_source
+from src.Audio.features import FeatureSummary, extract_features, full_band_summary
+from src.Audio.key_detection import estimate_key
+from src.Audio.profiles import DEFAULT_PROFILE, get_profile
+from src.Audio.streaming import analyze_stream
+from src.Audio.window import select_window
 
 logger = logging.getLogger(__name__)
 
-def analyze_audio(file_path: str) -> dict:
-    """Analyze audio file and extract features"""
+# Bump whenever a change alters analysis results, so cached results are not reused
+ANALYZER_VERSION = "7"
+
+def analyze_audio(source: AudioSource, streaming: bool = False, profile: str = DEFAULT_PROFILE,
+                  suffix: str = ".wav") -> dict:
+    """Analyze audio file (path or in-memory bytes with the upload's suffix) and extract features"""
     try:
-        # Load audio with higher sample rate
-        y, sr = librosa.load(file_path, duration=60, sr=44100)
-        logger.info("Audio file loaded successfully")
+        settings = get_profile(profile)
+        offset = 0.0
+        with open_audio_source(source, suffix) as audio:
+            if streaming:
+                # Whole track, block by block, at the file's native sample rate
+                tempo, summary = analyze_stream(audio, settings)
+                logger.info("Audio file streamed successfully")
+            else:
+                # Cheap whole-file pre-scan so expensive features run on the drop, not the intro
+                if settings.select_window and settings.duration:
+                    offset = select_window(audio, settings.duration)
 
-        # Improved BPM detection using multiple methods
-        onset_env = librosa.onset.onset_strength(y=y, sr=sr, aggregate=np.median)
-        tempo_candidates = librosa.beat.tempo(onset_envelope=onset_env, sr=sr, aggregate=None)
-        
-        # Get the most prominent tempo
-        tempo = float(librosa.beat.tempo(onset_envelope=onset_env, sr=sr))
-        
-        # Refine BPM to common EDM ranges (115-135 BPM)
-        if tempo < 115:
-            tempo *= 2
-        elif tempo > 135:
-            tempo /= 2
-            
-        # Enhanced key detection using multiple features
-        y_harmonic = librosa.effects.harmonic(y)
-        chromagram = librosa.feature.chroma_stft(y=y_harmonic, sr=sr, n_chroma=12)
-        chroma_vals = np.mean(chromagram, axis=1)
-        
-        # Key detection with confidence check
-        key_idx = np.argmax(chroma_vals)
-        key_confidence = chroma_vals[key_idx] / np.sum(chroma_vals)
-        
-        keys = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-        
-        # Improved major/minor detection
-        major_profile = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
-        minor_profile = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
-        
-        major_profile = np.roll(major_profile, key_idx)
-        minor_profile = np.roll(minor_profile, key_idx)
-        
-        major_corr = np.corrcoef(chroma_vals, major_profile)[0,1]
-        minor_corr = np.corrcoef(chroma_vals, minor_profile)[0,1]
-        
-        key_quality = "Major" if major_corr > minor_corr else "Minor"
-        
-        return {
-            "bpm": str(int(round(tempo))),
-            "key": f"{keys[key_idx]} {key_quality}",
-            "key_confidence": f"{key_confidence:.2%}",
-            "energy": calculate_energy(y),
-            "genre": detect_genre(tempo, y, sr)
-        }
+                # Load the window once at the native rate; features run at the profile's rate
+                y, sr, native, native_sr = load_window(audio, offset, settings.duration, settings.sr)
+                logger.info(f"Audio file loaded successfully ({settings.name} profile, from {offset:.1f}s)")
+
+                # Single STFT shared by tempo, key, energy and genre detection
+                features = extract_features(
+                    y, sr, n_fft=settings.n_fft, hop_length=settings.hop_length, hpss=settings.hpss
+                )
+                tempo = float(librosa.feature.tempo(onset_envelope=features.onset_env, sr=sr, hop_length=features.hop_length)[0])
+                summary = full_band_summary(features.summarize(), native, native_sr)
+
+        return {**describe_track(tempo, summary), "profile": settings.name, "analysis_offset": offset}
         
     except Exception as e:
         logger.error(f"Error in audio analysis: {str(e)}")
         raise
 
-def calculate_energy(y: np.ndarray) -> str:
-    """Calculate track energy using multiple features"""
-    rms = librosa.feature.rms(y=y)[0]
-    spectral = librosa.feature.spectral_centroid(y=y)[0]
+def load_window(audio: Union[str, BinaryIO], offset: float, duration: Optional[float], sr: int) -> Tuple[np.ndarray, int, np.ndarray, int]:
+    """(y at sr, sr, y at the native rate, native rate) for one analysis window"""
+    native, native_sr = librosa.load(audio, offset=offset, duration=duration, sr=None)
+    if native_sr == sr:
+        return native, sr, native, native_sr
+    return librosa.resample(native, orig_sr=native_sr, target_sr=sr), sr, native, native_sr
+
+def describe_track(tempo: float, summary: FeatureSummary) -> dict:
+    """Turn tempo and track-level statistics into the analysis result"""
+    # Refine BPM to common EDM ranges (115-135 BPM)
+    if tempo < 115:
+        tempo *= 2
+    elif tempo > 135:
+        tempo /= 2
+        
+    # Score all 24 keys at once and keep the runner-ups for the UI
+    key_estimate = estimate_key(summary.chroma_mean)
     
-    energy_score = (np.mean(rms) * 0.6 + np.percentile(spectral, 95) / 10000 * 0.4)
+    return {
+        "bpm": str(int(round(tempo))),
+        "key": key_estimate["key"],
+        "key_confidence": f"{key_estimate['confidence']:.2%}",
+        "key_candidates": [candidate["key"] for candidate in key_estimate["ranking"]],
+        "energy": calculate_energy(summary),
+        "energy_score": round(float(energy_score(summary)), 4),
+        "genre": detect_genre(tempo, summary),
+        # Pitch-class profile, kept for similarity search
+        "chroma": [round(float(v), 4) for v in summary.chroma_mean]
+    }
+
+def energy_score(summary: FeatureSummary) -> float:
+    """Continuous energy measure behind the High/Medium/Low label"""
+    # Thresholds were tuned against a centroid scaled to 22.05 kHz on 44.1 kHz input
+    return summary.rms_mean * 0.6 + summary.centroid_p95 / 20000 * 0.4
+
+def calculate_energy(summary: FeatureSummary) -> str:
+    """Calculate track energy using multiple features"""
+    score = energy_score(summary)
     
-    if energy_score > 0.15:
+    if score > 0.15:
         return "High"
-    elif energy_score > 0.08:
+    elif score > 0.08:
         return "Medium"
     return "Low"
 
-def detect_genre(tempo: float, y: np.ndarray, sr: int) -> str:
+def detect_genre(tempo: float, summary: FeatureSummary) -> str:
     """Detect EDM subgenre based on audio features"""
-    spectral = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-    spectral_mean = np.mean(spectral)
+    spectral_mean = summary.centroid_mean
+    energy = calculate_energy(summary)
     
     if 124 <= tempo <= 128:
-        if calculate_energy(y) == "High" and spectral_mean > 2000:
+        if energy == "High" and spectral_mean > 2000:
             return "Future House"
         return "Tech House"
-    elif 128 <= tempo <= 135 and calculate_energy(y) == "High":
+    elif 128 <= tempo <= 135 and energy == "High":
         return "Bass House"
     elif 126 <= tempo <= 130:
         return "Progressive House"
@@ -0,0 +1,112 @@
+import argparse
+import csv
+import glob
+import json
+import logging
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Set
+from src.Audio.analyzer import analyze_audio
+from src.Audio.decode import AUDIO_EXTENSIONS
+from src.Audio.profiles import DEFAULT_PROFILE, PROFILES
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CSV_FIELDS = ['path', 'status', 'latency', 'bpm', 'key', 'key_confidence', 'energy', 'genre', 'profile', 'error']
+
+def collect_files(inputs: Iterable[str]) -> List[str]:
+    """Expand directories and glob patterns into a sorted list of audio files"""
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, '**', '*'), recursive=True)
+        else:
+            matches = glob.glob(item, recursive=True)
+        for path in matches:
+            if os.path.isfile(path) and path.lower().endswith(AUDIO_EXTENSIONS):
+                files.add(os.path.abspath(path))
+    return sorted(files)
+
+def load_completed(output_path: str) -> Set[str]:
+    """Paths already written to a previous (possibly interrupted) run's output"""
+    if not os.path.exists(output_path):
+        return set()
+
+    completed = set()
+    with open(output_path, 'r', newline='') as f:
+        if output_path.endswith('.csv'):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        try:
+            for row in rows:
+                completed.add(row['path'])
+        except (json.JSONDecodeError, KeyError):
+            # A run killed mid-write can leave a truncated last line
+            pass
+    return completed
+
+def analyze_file(path: str, streaming: bool, profile: str) -> Dict:
+    """Worker entry point: analyze one file and time it"""
+    start = time.perf_counter()
+    try:
+        features = analyze_audio(path, streaming=streaming, profile=profile)
+        return {'path': path, 'status': 'ok', 'latency': time.perf_counter() - start, **features}
+    except Exception as e:
+        return {'path': path, 'status': 'error', 'latency': time.perf_counter() - start, 'error': str(e)}
+
+def run_batch(files: List[str], output_path: str, workers: int, streaming: bool, profile: str) -> List[float]:
+    """Fan files out over a process pool and append each result as it finishes"""
+    is_csv = output_path.endswith('.csv')
+    write_header = is_csv and not os.path.exists(output_path)
+    latencies = []
+
+    with open(output_path, 'a', newline='') as out, ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction='ignore') if is_csv else None
+        if write_header:
+            writer.writeheader()
+
+        futures = [pool.submit(analyze_file, path, streaming, profile) for path in files]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            if writer:
+                writer.writerow(result)
+            else:
+                out.write(json.dumps(result) + '\n')
+            out.flush()
+
+            latencies.append(result['latency'])
+            logger.info(f"[{done}/{len(files)}] {result['status']} {result['path']} ({result['latency']:.2f}s)")
+
+    return latencies
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Batch-analyze audio files with the OTW analyzer")
+    parser.add_argument('inputs', nargs='+', help="Directories or glob patterns of audio files")
+    parser.add_argument('-o', '--output', default='analysis.jsonl', help="Results file (.jsonl or .csv)")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument('--streaming', action='store_true', help="Analyze full tracks in streaming mode")
+    parser.add_argument('--profile', choices=list(PROFILES), default=DEFAULT_PROFILE, help="Analysis quality profile")
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.inputs)
+    completed = load_completed(args.output)
+    pending = [path for path in files if path not in completed]
+    logger.info(f"Found {len(files)} files, {len(completed)} already analyzed, {len(pending)} pending")
+    if not pending:
+        return
+
+    start = time.perf_counter()
+    latencies = run_batch(pending, args.output, args.workers, args.streaming, args.profile)
+    elapsed = time.perf_counter() - start
+
+    print(f"Analyzed {len(latencies)} files in {elapsed:.1f}s ({len(latencies) / elapsed:.2f} files/sec)")
+    print(f"Per-file latency: mean {np.mean(latencies):.2f}s | "
+          f"p50 {np.percentile(latencies, 50):.2f}s | p95 {np.percentile(latencies, 95):.2f}s | "
+          f"max {np.max(latencies):.2f}s")
+
+if __name__ == "__main__":
+    main()
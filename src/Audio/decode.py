@@ -0,0 +1,58 @@
+import io
+import os
+import logging
+import tempfile
+import soundfile as sf
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Union
+
+logger = logging.getLogger(__name__)
+
+AudioSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+# Upload formats; libsndfile >= 1.1 decodes all of them straight from memory, block by block
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.mp3', '.ogg')
+
+def is_buffer(source: AudioSource) -> bool:
+    """True for in-memory bytes-like sources"""
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+def can_decode_in_memory(buffer: BinaryIO) -> bool:
+    """Check whether soundfile recognises the buffer's format, then rewind it"""
+    try:
+        sf.info(buffer)
+        return True
+    except sf.LibsndfileError:
+        return False
+    finally:
+        buffer.seek(0)
+
+def write_temporary_audio(data: Union[bytes, memoryview], suffix: str = ".wav") -> str:
+    """Write audio bytes to a unique temporary file; the caller removes it"""
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+@contextmanager
+def open_audio_source(source: AudioSource, suffix: str = ".wav") -> Iterator[Union[str, BinaryIO]]:
+    """Yield something librosa/soundfile can read, decoding buffers from memory"""
+    if not is_buffer(source):
+        yield source
+        return
+
+    buffer = io.BytesIO(source)
+    if can_decode_in_memory(buffer):
+        yield buffer
+        return
+
+    # soundfile can't decode this format from memory; audioread needs a real path
+    logger.info(f"Spilling {suffix} upload to a temporary file for decoding")
+    path = write_temporary_audio(source, suffix)
+    try:
+        yield path
+    finally:
+        os.remove(path)
@@ -0,0 +1,83 @@
+import librosa
+import numpy as np
+from dataclasses import dataclass, replace
+
+N_FFT = 2048
+HOP_LENGTH = 512
+
+@dataclass
+class AudioFeatures:
+    """Frame-level features derived from a single STFT of a track"""
+    sr: int
+    hop_length: int
+    onset_env: np.ndarray
+    chroma: np.ndarray
+    rms: np.ndarray
+    centroid: np.ndarray
+
+    def summarize(self) -> 'FeatureSummary':
+        """Reduce frame-level features to track-level statistics"""
+        return FeatureSummary(
+            sr=self.sr,
+            chroma_mean=np.mean(self.chroma, axis=1),
+            rms_mean=float(np.mean(self.rms)),
+            centroid_mean=float(np.mean(self.centroid)),
+            centroid_p95=float(np.percentile(self.centroid, 95))
+        )
+
+@dataclass
+class FeatureSummary:
+    """Track-level statistics consumed by key, energy and genre detection"""
+    sr: int
+    chroma_mean: np.ndarray
+    rms_mean: float
+    centroid_mean: float
+    centroid_p95: float
+
+def extract_features(y: np.ndarray, sr: int, n_fft: int = N_FFT, hop_length: int = HOP_LENGTH,
+                     center: bool = True, hpss: bool = True) -> AudioFeatures:
+    """Compute one magnitude spectrogram and derive every analysis feature from it"""
+    window = librosa.filters.get_window('hann', n_fft, fftbins=True)
+    S = np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length, window=window, center=center))
+    power = S ** 2
+
+    # Same mel/dB front end librosa.onset.onset_strength builds from y
+    mel = librosa.feature.melspectrogram(S=power, sr=sr, n_fft=n_fft)
+    onset_env = librosa.onset.onset_strength(
+        S=librosa.power_to_db(mel), sr=sr, hop_length=hop_length, center=center, aggregate=np.median
+    )
+
+    # HPSS on the existing magnitude instead of a second STFT/iSTFT round-trip
+    if hpss:
+        harmonic, _ = librosa.decompose.hpss(S)
+        chroma = librosa.feature.chroma_stft(S=harmonic ** 2, sr=sr, n_fft=n_fft, n_chroma=12)
+    else:
+        chroma = librosa.feature.chroma_stft(S=power, sr=sr, n_fft=n_fft, n_chroma=12)
+
+    # Undo the window's energy loss so RMS matches the time-domain values
+    rms = librosa.feature.rms(S=S, frame_length=n_fft, hop_length=hop_length)[0] / np.sqrt(np.mean(window ** 2))
+    centroid = librosa.feature.spectral_centroid(S=S, sr=sr, n_fft=n_fft, hop_length=hop_length)[0]
+
+    return AudioFeatures(
+        sr=sr,
+        hop_length=hop_length,
+        onset_env=onset_env,
+        chroma=chroma,
+        rms=rms,
+        centroid=centroid
+    )
+
+def full_band_summary(summary: FeatureSummary, y: np.ndarray, sr: int, n_fft: int = N_FFT,
+                      hop_length: int = N_FFT) -> FeatureSummary:
+    """Summary with RMS and centroid statistics taken from the native-rate audio of the same window
+
+    Resampling drops everything above the lower Nyquist, so the centroid (and, for bright
+    material, the RMS) would shrink and shift the energy score, which was tuned on full-band audio.
+    Non-overlapping frames are plenty for track-level statistics.
+    """
+    if sr == summary.sr:
+        return summary
+    rms = librosa.feature.rms(y=y, frame_length=n_fft, hop_length=hop_length)[0]
+    centroid = librosa.feature.spectral_centroid(y=y, sr=sr, n_fft=n_fft, hop_length=hop_length)[0]
+    return replace(summary, sr=sr, rms_mean=float(np.mean(rms)), centroid_mean=float(np.mean(centroid)),
+                   centroid_p95=float(np.percentile(centroid, 95)))
@@ -0,0 +1,239 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import librosa
+import numpy as np
+import soundfile as sf
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple, Union
+from src.Audio.decode import AudioSource, open_audio_source
+from datetime import timedelta
+from src.utlis.analysis_cache import analysis_cache
+from src.utlis.cache_store import CACHE_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_DB = CACHE_DB_PATH
+MAX_FINGERPRINTS = 1000  # about 40 KB each for a five-minute track, held in memory by every process
+FINGERPRINT_TTL = timedelta(days=30)
+HOP_SECONDS = 0.5  # one chroma frame per half second
+ONSET_STEPS = 5  # energy-flux frames per chroma frame, so trims align to 0.1s
+FALLBACK_SR = 22050  # formats soundfile can't read are decoded by librosa at this rate
+MAX_OFFSET_SECONDS = 60.0  # longest trim at the start of a track we still align
+MIN_OVERLAP = 0.8  # share of the shorter track that has to line up
+MIN_OVERLAP_SECONDS = 10.0
+PROFILE_THRESHOLD = 0.9  # whole-track pitch profile cosine to be worth aligning
+CHROMA_THRESHOLD = 0.95  # mean per-frame chroma cosine over the aligned frames
+ONSET_THRESHOLD = 0.7  # correlation of the energy flux over the aligned frames
+MAX_CANDIDATES = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    analysis_key TEXT NOT NULL UNIQUE,
+    version TEXT NOT NULL,
+    chroma BLOB NOT NULL,
+    onset BLOB NOT NULL,
+    added_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fingerprints_added_at ON fingerprints (added_at);
+"""
+
+def _blocks(audio: Union[str, BinaryIO]) -> Iterator[Tuple[np.ndarray, int]]:
+    """Mono blocks of HOP_SECONDS, read incrementally where soundfile can decode the format"""
+    try:
+        with sf.SoundFile(audio) as sound_file:
+            sr = sound_file.samplerate
+            for block in sound_file.blocks(blocksize=int(sr * HOP_SECONDS), dtype='float32', always_2d=True):
+                yield block.mean(axis=1), sr
+            return
+    except sf.LibsndfileError:
+        if hasattr(audio, 'seek'):
+            audio.seek(0)
+    y, sr = librosa.load(audio, sr=FALLBACK_SR, mono=True)
+    hop = int(sr * HOP_SECONDS)
+    for start in range(0, len(y), hop):
+        yield y[start:start + hop], sr
+
+def compute_fingerprint(audio: Union[str, BinaryIO]) -> Dict[str, np.ndarray]:
+    """Chroma frames every HOP_SECONDS and energy flux ONSET_STEPS times as often, over the whole track
+
+    Both are level- and encoding-independent, so renamed, re-bounced or re-encoded copies
+    of a track produce near-identical frames.
+    """
+    chroma, rms = [], []
+    chroma_filter, n_fft, window = None, 0, None
+    for block, sr in _blocks(audio):
+        if chroma_filter is None:
+            n_fft = 2 ** int(np.ceil(np.log2(sr * 0.09)))
+            chroma_filter = librosa.filters.chroma(sr=sr, n_fft=n_fft)
+            window = np.hanning(n_fft)
+        # Average a few short spectra across the block so the frame is stable against small shifts
+        frames = max(len(block) // n_fft, 1)
+        segment = np.pad(block, (0, max(frames * n_fft - len(block), 0)))[:frames * n_fft]
+        power = np.mean(np.abs(np.fft.rfft(segment.reshape(frames, n_fft) * window, axis=1)) ** 2, axis=0)
+        chroma.append(chroma_filter @ power)
+        steps = np.array_split(block, ONSET_STEPS)
+        rms.extend(np.sqrt(np.mean(step ** 2)) if len(step) else 0.0 for step in steps)
+
+    chroma = np.asarray(chroma, dtype=np.float32).reshape(-1, 12)
+    chroma /= np.maximum(np.linalg.norm(chroma, axis=1, keepdims=True), 1e-9)
+    rms = np.asarray(rms, dtype=np.float32)
+    flux = np.maximum(0.0, np.diff(rms, prepend=rms[:1]))
+    return {'chroma': chroma, 'onset': flux.astype(np.float32)}
+
+def fingerprint_audio(source: AudioSource, suffix: str = ".wav") -> Dict[str, np.ndarray]:
+    """Worker entry point: fingerprint a path or in-memory upload"""
+    with open_audio_source(source, suffix) as audio:
+        return compute_fingerprint(audio)
+
+def _profile(fingerprint: Dict[str, np.ndarray]) -> np.ndarray:
+    """Whole-track pitch-class profile, used to shortlist candidates"""
+    profile = fingerprint['chroma'].mean(axis=0)
+    return profile / (np.linalg.norm(profile) or 1.0)
+
+def _correlation(a: np.ndarray, b: np.ndarray) -> float:
+    a, b = a - a.mean(), b - b.mean()
+    norm = np.linalg.norm(a) * np.linalg.norm(b)
+    return float(a @ b / norm) if norm > 0 else 0.0
+
+def similarity(query: Dict[str, np.ndarray], stored: Dict[str, np.ndarray]) -> Tuple[float, float]:
+    """(chroma, onset) similarity at the best alignment of query against stored; (0, 0) if they can't overlap"""
+    frames = np.dot(query['chroma'], stored['chroma'].T)
+    n_query, n_stored = frames.shape
+    min_overlap = max(MIN_OVERLAP * min(n_query, n_stored), MIN_OVERLAP_SECONDS / HOP_SECONDS)
+    max_offset = int(MAX_OFFSET_SECONDS / HOP_SECONDS)
+
+    best, best_offset = 0.0, None
+    # offset > 0: the query starts later in the stored track (trimmed intro), < 0: earlier
+    for offset in range(-min(n_query - 1, max_offset), min(n_stored - 1, max_offset) + 1):
+        aligned = np.diagonal(frames, offset)
+        if len(aligned) >= min_overlap and aligned.mean() > best:
+            best, best_offset = float(aligned.mean()), offset
+    if best_offset is None:
+        return 0.0, 0.0
+
+    # Chroma aligns to the nearest frame; refine within it on the finer onset grid
+    onset = -1.0
+    for offset in range(best_offset * ONSET_STEPS - ONSET_STEPS, best_offset * ONSET_STEPS + ONSET_STEPS + 1):
+        start_query, start_stored = max(-offset, 0), max(offset, 0)
+        length = min(len(query['onset']) - start_query, len(stored['onset']) - start_stored)
+        if length > 1:
+            onset = max(onset, _correlation(query['onset'][start_query:start_query + length],
+                                            stored['onset'][start_stored:start_stored + length]))
+    return best, onset
+
+class FingerprintIndex:
+    """Fingerprints of analyzed uploads in a table of the cache database, mirrored in memory by each process
+
+    Row ids only grow, so each process loads just the rows added since it last looked. Rows past
+    FINGERPRINT_TTL or beyond the newest max_entries are evicted, and a match moves its row to the end.
+    """
+
+    def __init__(self, path: str = FINGERPRINT_DB, max_entries: int = MAX_FINGERPRINTS,
+                 ttl: timedelta = FINGERPRINT_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl.total_seconds()
+        self._entries: Dict[str, Dict] = {}
+        self._last_id = 0
+        self._oldest_id = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, row_id: int, analysis_key: str, version: str, fingerprint: Dict[str, np.ndarray]) -> None:
+        self._entries[analysis_key] = {'id': row_id, 'version': version, 'fingerprint': fingerprint,
+                                       'profile': _profile(fingerprint)}
+
+    def _refresh(self) -> None:
+        """Load rows added since the last look and forget evicted ones (caller holds the lock)"""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT id, analysis_key, version, chroma, onset FROM fingerprints WHERE id > ? ORDER BY id",
+            (self._last_id,)
+        ).fetchall()
+        for row_id, analysis_key, version, chroma, onset in rows:
+            fingerprint = {'chroma': np.frombuffer(chroma, dtype=np.float32).reshape(-1, 12),
+                           'onset': np.frombuffer(onset, dtype=np.float32)}
+            self._remember(row_id, analysis_key, version, fingerprint)
+            self._last_id = row_id
+
+        # Eviction goes oldest id first, so everything below the oldest row left is gone
+        oldest = conn.execute("SELECT MIN(id) FROM fingerprints").fetchone()[0] or self._last_id + 1
+        if oldest > self._oldest_id:
+            self._entries = {key: entry for key, entry in self._entries.items() if entry['id'] >= oldest}
+            self._oldest_id = oldest
+
+    def _insert(self, analysis_key: str, version: str, fingerprint: Dict[str, np.ndarray]) -> None:
+        """(Re)write a row at the end of the table and evict what no longer fits (caller holds the lock)"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO fingerprints (analysis_key, version, chroma, onset, added_at) VALUES (?, ?, ?, ?, ?)",
+            (analysis_key, version, fingerprint['chroma'].astype(np.float32).tobytes(),
+             fingerprint['onset'].astype(np.float32).tobytes(), now)
+        )
+        conn.execute("DELETE FROM fingerprints WHERE added_at <= ?", (now - self.ttl,))
+        conn.execute(
+            "DELETE FROM fingerprints WHERE id <= (SELECT id FROM fingerprints ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def add(self, analysis_key: str, version: str, fingerprint: Dict[str, np.ndarray]) -> None:
+        """Remember the fingerprint of an upload whose analysis is cached under analysis_key"""
+        try:
+            with self._lock:
+                self._insert(analysis_key, version, fingerprint)
+                self._refresh()
+        except sqlite3.Error as e:
+            logger.error(f"Fingerprint write failed: {str(e)}")
+
+    def match(self, fingerprint: Dict[str, np.ndarray], version: str) -> Optional[str]:
+        """Analysis key of a stored upload with near-identical audio, analyzed with the same version"""
+        try:
+            with self._lock:
+                self._refresh()
+                entries = [(key, entry) for key, entry in self._entries.items() if entry['version'] == version]
+        except sqlite3.Error as e:
+            logger.error(f"Fingerprint read failed: {str(e)}")
+            return None
+        if not entries or not len(fingerprint['chroma']):
+            return None
+
+        # Shortlist by whole-track pitch profile before aligning frame by frame
+        profiles = np.stack([entry['profile'] for _, entry in entries])
+        scores = profiles @ _profile(fingerprint)
+        shortlist = [i for i in np.argsort(scores)[::-1][:MAX_CANDIDATES] if scores[i] >= PROFILE_THRESHOLD]
+
+        best_key, best_score = None, 0.0
+        for i in shortlist:
+            key, entry = entries[i]
+            chroma, onset = similarity(fingerprint, entry['fingerprint'])
+            if chroma >= CHROMA_THRESHOLD and onset >= ONSET_THRESHOLD and chroma > best_score:
+                best_key, best_score = key, chroma
+        if best_key:
+            logger.info(f"Fingerprint matched a previous upload (chroma similarity {best_score:.3f})")
+            # Matched fingerprints are the ones worth keeping
+            self.add(best_key, version, dict(entries)[best_key]['fingerprint'])
+        return best_key
+
+# Shared by every Streamlit session in this process
+fingerprint_index = FingerprintIndex()
+
+def lookup_analysis(fingerprint: Dict[str, np.ndarray], version: str, cache_key: str) -> Optional[Dict]:
+    """Cached analysis of an earlier upload with the same audio, copied to cache_key for exact re-uploads"""
+    match = fingerprint_index.match(fingerprint, version)
+    features = analysis_cache.get(match) if match else None
+    if features:
+        analysis_cache.set(cache_key, features)
+    return features
@@ -0,0 +1,56 @@
+import numpy as np
+from typing import Dict, List
+
+PITCH_CLASSES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+
+# Krumhansl-Kessler key profiles, tonic at index 0
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+KEY_NAMES = [f"{pc} Major" for pc in PITCH_CLASSES] + [f"{pc} Minor" for pc in PITCH_CLASSES]
+
+def _zscore(x: np.ndarray) -> np.ndarray:
+    """Standardize along the last axis; constant rows become all zeros"""
+    centered = x - x.mean(axis=-1, keepdims=True)
+    std = centered.std(axis=-1, keepdims=True)
+    return np.divide(centered, std, out=np.zeros_like(centered), where=std > 0)
+
+# 24x12 matrix of every rotation, standardized once so scoring is a single matmul
+KEY_PROFILES = np.vstack(
+    [np.roll(MAJOR_PROFILE, i) for i in range(12)] + [np.roll(MINOR_PROFILE, i) for i in range(12)]
+)
+_KEY_PROFILES_Z = _zscore(KEY_PROFILES)
+
+def score_keys(chroma: np.ndarray) -> np.ndarray:
+    """Pearson correlation of one (12,) or many (n, 12) chroma vectors with all 24 keys"""
+    chroma = np.asarray(chroma, dtype=float)
+    return _zscore(chroma) @ _KEY_PROFILES_Z.T / chroma.shape[-1]
+
+def rank_keys(chroma: np.ndarray, top_k: int = 3) -> List[List[Dict]]:
+    """Ranked key candidates with their margin over the next candidate, per chroma vector"""
+    scores = np.atleast_2d(score_keys(chroma))
+    order = np.argsort(-scores, axis=1)
+    ranked = np.take_along_axis(scores, order, axis=1)
+    margins = ranked - np.concatenate([ranked[:, 1:], ranked[:, -1:]], axis=1)
+
+    return [
+        [
+            {"key": KEY_NAMES[order[row, i]], "score": float(ranked[row, i]), "margin": float(margins[row, i])}
+            for i in range(min(top_k, len(KEY_NAMES)))
+        ]
+        for row in range(scores.shape[0])
+    ]
+
+def estimate_key(chroma: np.ndarray, top_k: int = 3) -> Dict:
+    """Best key for a single track's chroma, with confidence and runner-up candidates"""
+    ranking = rank_keys(chroma, top_k)[0]
+    return {
+        "key": ranking[0]["key"],
+        "confidence": ranking[0]["margin"],
+        "ranking": ranking
+    }
+
+def estimate_keys(chroma_batch: np.ndarray) -> List[str]:
+    """Best key for each row of an (n, 12) chroma batch in one matrix operation"""
+    scores = np.atleast_2d(score_keys(chroma_batch))
+    return [KEY_NAMES[i] for i in np.argmax(scores, axis=1)]
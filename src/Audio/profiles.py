@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+@dataclass(frozen=True)
+class AnalysisProfile:
+    """Speed/accuracy settings for one analysis run"""
+    name: str
+    sr: int
+    n_fft: int
+    hop_length: int
+    duration: Optional[float]
+    hpss: bool
+    select_window: bool
+
+PROFILES: Dict[str, AnalysisProfile] = {
+    # Sub-second preview: low sample rate, 30s window, chroma straight from the STFT
+    "fast": AnalysisProfile(name="fast", sr=11025, n_fft=1024, hop_length=256, duration=30, hpss=False,
+                            select_window=True),
+    "standard": AnalysisProfile(name="standard", sr=22050, n_fft=2048, hop_length=512, duration=60, hpss=True,
+                                select_window=True),
+    # Original settings, analyzing the most energetic 60s rather than the first 60s
+    "full": AnalysisProfile(name="full", sr=44100, n_fft=2048, hop_length=512, duration=60, hpss=True,
+                            select_window=True),
+}
+
+DEFAULT_PROFILE = "full"
+
+def get_profile(name: str) -> AnalysisProfile:
+    """Look up an analysis profile by name"""
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown analysis profile '{name}', expected one of {', '.join(PROFILES)}")
@@ -0,0 +1,99 @@
+import librosa
+import numpy as np
+import logging
+import soundfile as sf
+from typing import BinaryIO, Tuple, Union
+from src.Audio.features import HOP_LENGTH, AudioFeatures, FeatureSummary, extract_features
+from src.Audio.profiles import AnalysisProfile
+
+logger = logging.getLogger(__name__)
+
+# Frames per streamed block (~12s at 44.1 kHz); bounds peak memory per track
+BLOCK_LENGTH = 1024
+CENTROID_BINS = 2048
+TEMPO_WINDOW_SECONDS = 8.0
+
+class FeatureAccumulator:
+    """Running track-level statistics over streamed feature blocks"""
+
+    def __init__(self, sr: int, hop_length: int = HOP_LENGTH):
+        self.sr = sr
+        self.hop_length = hop_length
+        self.win_length = librosa.time_to_frames(TEMPO_WINDOW_SECONDS, sr=sr, hop_length=hop_length).item()
+        self.frames = 0
+        self.chroma_sum = np.zeros(12)
+        self.rms_sum = 0.0
+        self.centroid_sum = 0.0
+        self.centroid_edges = np.linspace(0, sr / 2, CENTROID_BINS + 1)
+        self.centroid_hist = np.zeros(CENTROID_BINS)
+        self.tempogram_sum = np.zeros(self.win_length)
+        self.tempogram_frames = 0
+
+    def update(self, features: AudioFeatures) -> None:
+        """Fold one block of frame-level features into the running totals"""
+        frames = features.rms.shape[0]
+        self.frames += frames
+        self.chroma_sum += features.chroma.sum(axis=1)
+        self.rms_sum += float(features.rms.sum())
+        self.centroid_sum += float(features.centroid.sum())
+        self.centroid_hist += np.histogram(features.centroid, bins=self.centroid_edges)[0]
+
+        if features.onset_env.size:
+            tg = librosa.feature.tempogram(
+                onset_envelope=features.onset_env,
+                sr=self.sr,
+                hop_length=self.hop_length,
+                win_length=self.win_length
+            )
+            self.tempogram_sum += tg.sum(axis=1)
+            self.tempogram_frames += tg.shape[1]
+
+    def tempo(self) -> float:
+        """Global tempo estimate from the averaged tempogram"""
+        if not self.tempogram_frames:
+            raise ValueError("No audio frames were accumulated")
+        tg = (self.tempogram_sum / self.tempogram_frames)[:, np.newaxis]
+        return float(librosa.feature.tempo(tg=tg, sr=self.sr, hop_length=self.hop_length, aggregate=None)[0])
+
+    def summarize(self) -> FeatureSummary:
+        """Track-level statistics over every block seen so far"""
+        if not self.frames:
+            raise ValueError("No audio frames were accumulated")
+
+        # 95th percentile from the centroid histogram, resolved to one bin
+        cumulative = np.cumsum(self.centroid_hist)
+        p95_bin = int(np.searchsorted(cumulative, 0.95 * cumulative[-1]))
+        centroid_p95 = float((self.centroid_edges[p95_bin] + self.centroid_edges[p95_bin + 1]) / 2)
+
+        return FeatureSummary(
+            sr=self.sr,
+            chroma_mean=self.chroma_sum / self.frames,
+            rms_mean=self.rms_sum / self.frames,
+            centroid_mean=self.centroid_sum / self.frames,
+            centroid_p95=centroid_p95
+        )
+
+def analyze_stream(audio: Union[str, BinaryIO], profile: AnalysisProfile,
+                   block_length: int = BLOCK_LENGTH) -> Tuple[float, FeatureSummary]:
+    """Stream a whole file block by block and return its tempo and feature summary"""
+    with sf.SoundFile(audio) as sound_file:
+        # Blocks are analyzed at the native rate; the profile sets frame size and HPSS
+        sr = sound_file.samplerate
+        accumulator = FeatureAccumulator(sr, profile.hop_length)
+
+        stream = librosa.stream(
+            sound_file,
+            block_length=block_length,
+            frame_length=profile.n_fft,
+            hop_length=profile.hop_length
+        )
+        for block in stream:
+            # The final partial block can be shorter than one frame
+            if block.shape[-1] < profile.n_fft:
+                continue
+            accumulator.update(extract_features(
+                block, sr, n_fft=profile.n_fft, hop_length=profile.hop_length, center=False, hpss=profile.hpss
+            ))
+
+    logger.info(f"Streamed {accumulator.frames} frames at {sr} Hz")
+    return accumulator.tempo(), accumulator.summarize()
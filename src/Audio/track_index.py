@@ -0,0 +1,162 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+from src.Audio.key_detection import PITCH_CLASSES
+
+logger = logging.getLogger(__name__)
+
+TRACK_INDEX_PATH = os.path.join("data", "track_index.npz")
+TRACK_DEFAULTS = {'channel': '', 'url': '#', 'thumbnail': 'https://via.placeholder.com/120x90.png', 'views': 0, 'likes': 0}
+METADATA_FIELDS = ['title', 'channel', 'url', 'thumbnail', 'videoId', 'views', 'likes', 'bpm', 'key', 'energy', 'genre']
+
+# Per-dimension weights: [bpm, energy, fifths cos, fifths sin, mode, chroma x12]
+FEATURE_WEIGHTS = np.array([1.0, 1.0, 0.75, 0.75, 0.5] + [2.0] * 12, dtype=np.float32)
+GENRE_PENALTY = 1.0  # added to the distance of tracks from another genre
+
+def feature_vector(features: Dict) -> np.ndarray:
+    """Fixed-length vector for an analyze_audio result: tempo, energy, key and chroma profile"""
+    bpm = float(features.get('bpm') or 128)
+    energy = float(features.get('energy_score', 0.1))
+
+    # Place keys on the circle of fifths, minor keys at their relative major, so close keys are close
+    pitch, _, mode = features.get('key', 'C Major').partition(' ')
+    pc = PITCH_CLASSES.index(pitch) if pitch in PITCH_CLASSES else 0
+    major_pc = (pc + 3) % 12 if mode == 'Minor' else pc
+    angle = 2 * np.pi * (major_pc * 7 % 12) / 12
+
+    chroma = np.asarray(features.get('chroma') or np.ones(12), dtype=np.float32)
+    chroma = chroma / (np.linalg.norm(chroma) or 1.0)
+
+    head = [(bpm - 128) / 8, energy * 10, np.cos(angle), np.sin(angle), 0.5 if mode == 'Minor' else -0.5]
+    return np.concatenate([np.asarray(head, dtype=np.float32), chroma]) * np.sqrt(FEATURE_WEIGHTS)
+
+def _track_id(track: Dict) -> Optional[str]:
+    """videoId, else a real url; tracks without either are never deduplicated"""
+    if track.get('videoId'):
+        return track['videoId']
+    if track.get('url') not in (None, '#'):
+        return track['url']
+    return None
+
+class TrackIndex:
+    """Reference tracks as one float32 matrix plus metadata, searched by weighted Euclidean distance"""
+
+    def __init__(self, vectors: Optional[np.ndarray] = None, metadata: Optional[List[Dict]] = None):
+        self.vectors = vectors if vectors is not None else np.zeros((0, len(FEATURE_WEIGHTS)), dtype=np.float32)
+        self.metadata = metadata or []
+        self._genres = np.array([m.get('genre', '') for m in self.metadata])
+
+    def __len__(self) -> int:
+        return len(self.metadata)
+
+    def add(self, metadata: Dict, features: Dict) -> None:
+        """Add a track, replacing an earlier entry with the same videoId or url"""
+        self.extend([(metadata, features)])
+
+    def extend(self, tracks: List[tuple]) -> None:
+        """Add (metadata, features) pairs in one go; later entries replace earlier ones with the same id"""
+        entries = {}
+        for metadata, vector in zip(self.metadata, self.vectors):
+            entries[_track_id(metadata) or f"#{len(entries)}"] = (metadata, vector)
+        for metadata, features in tracks:
+            values = {field: metadata.get(field, features.get(field)) for field in METADATA_FIELDS}
+            entry = {**TRACK_DEFAULTS, **{k: v for k, v in values.items() if v is not None}}
+            entries[_track_id(entry) or f"#{len(entries)}"] = (entry, feature_vector(features))
+
+        if entries:
+            self.metadata = [m for m, _ in entries.values()]
+            self.vectors = np.vstack([v for _, v in entries.values()]).astype(np.float32)
+            self._genres = np.array([m.get('genre', '') for m in self.metadata])
+
+    def query(self, features: Dict, top_k: int = 5, genre: Optional[str] = None) -> List[Dict]:
+        """Nearest reference tracks to an analyze_audio result"""
+        if not len(self):
+            return []
+        distances = np.sum((self.vectors - feature_vector(features)) ** 2, axis=1)
+        if genre:
+            distances = distances + (self._genres != genre) * GENRE_PENALTY
+
+        k = min(top_k, len(self))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return [{**self.metadata[i], 'distance': float(distances[i])} for i in nearest]
+
+    def save(self, path: str = TRACK_INDEX_PATH) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Write-then-rename so a running app never loads a partial index
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        metadata = np.frombuffer(json.dumps(self.metadata).encode(), dtype=np.uint8)
+        np.savez(tmp_path, vectors=self.vectors.astype(np.float32), metadata=metadata)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = TRACK_INDEX_PATH) -> 'TrackIndex':
+        with np.load(path) as data:
+            return cls(data['vectors'], json.loads(data['metadata'].tobytes().decode()))
+
+_index: Optional[TrackIndex] = None
+_index_mtime: Optional[float] = None
+_index_lock = threading.Lock()
+
+def get_track_index(path: str = TRACK_INDEX_PATH) -> Optional[TrackIndex]:
+    """Process-wide index, reloaded when the file is rebuilt; None if it hasn't been built"""
+    global _index, _index_mtime
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _index_lock:
+        if _index is None or mtime != _index_mtime:
+            try:
+                _index = TrackIndex.load(path)
+                _index_mtime = mtime
+                logger.info(f"Loaded track index with {len(_index)} tracks")
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Could not load track index: {str(e)}")
+                return _index
+        return _index
+
+def read_jsonl(path: str) -> Iterable[Dict]:
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def build_index(results_path: str, metadata_path: Optional[str] = None,
+                index: Optional[TrackIndex] = None) -> TrackIndex:
+    """Index successful results from a src.Audio.batch JSONL run, with optional per-path metadata"""
+    index = index or TrackIndex()
+    metadata = {row['path']: row for row in read_jsonl(metadata_path)} if metadata_path else {}
+
+    tracks = []
+    for result in read_jsonl(results_path):
+        if result.get('status') != 'ok':
+            continue
+        if 'chroma' not in result:
+            logger.warning(f"Skipping {result['path']}: analyzed before chroma was recorded, re-run the batch")
+            continue
+        track = {'title': os.path.splitext(os.path.basename(result['path']))[0], **metadata.get(result['path'], {})}
+        tracks.append((track, result))
+    index.extend(tracks)
+    return index
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the offline similar-track index from batch analysis results")
+    parser.add_argument('results', help="JSONL output of python -m src.Audio.batch")
+    parser.add_argument('--metadata', help="JSONL of {path, title, channel, url, videoId, thumbnail, views, likes}")
+    parser.add_argument('-o', '--output', default=TRACK_INDEX_PATH, help="Index file (.npz)")
+    parser.add_argument('--append', action='store_true', help="Add to an existing index instead of replacing it")
+    args = parser.parse_args(argv)
+
+    existing = TrackIndex.load(args.output) if args.append and os.path.exists(args.output) else None
+    index = build_index(args.results, args.metadata, existing)
+    index.save(args.output)
+    print(f"Indexed {len(index)} tracks into {args.output}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
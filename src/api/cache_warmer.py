@@ -0,0 +1,192 @@
+import argparse
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set
+from src.api.keyword_analyzer import analyze_keywords, generate_candidates
+from src.api.youtube import fetch_similar_tracks, CACHE_DURATION, CACHE_MAX_STALE
+from src.Audio.track_index import get_track_index
+from src.utlis.api_key_manager import UNIT_COSTS, get_key_manager, seconds_until_reset
+from src.utlis.cache_store import cache_store
+
+logger = logging.getLogger(__name__)
+
+CACHE_WARMER_ENV = "CACHE_WARMER"  # set to start the background warmer inside the app
+# Tempo ranges detect_genre assigns each genre to; House catches everything else
+GENRE_BPM_RANGES = {
+    "Future House": (124, 128),
+    "Tech House": (124, 128),
+    "Bass House": (128, 135),
+    "Progressive House": (126, 130),
+    "House": (118, 132),
+}
+SIMILAR_SEARCHES = 3  # channel + label searches fetch_similar_tracks makes per genre
+MIN_CYCLE_SECONDS = 600.0
+WARMER_BUDGET_SHARE = 0.25  # share of the quota left at the start of a cycle the warmer may spend
+
+@dataclass
+class WarmJob:
+    """One cache fill and the quota units it will spend"""
+    name: str
+    cost: int
+    run: Callable[[], None]
+
+def similar_job(genre: str) -> Optional[WarmJob]:
+    """Fetch a genre's tracks once and store them under every stale BPM bucket
+
+    find_similar_tracks caches per genre and BPM, but the search doesn't depend on the BPM.
+    """
+    low, high = GENRE_BPM_RANGES[genre]
+    keys = [f"similar_{genre}_{bpm}" for bpm in range(low, high + 1)]
+    stale = [key for key in keys if not cache_store.is_fresh(key)]
+    if not stale:
+        return None
+
+    def run():
+        tracks = fetch_similar_tracks(genre, essential=False)
+        if tracks is None:
+            raise RuntimeError(f"No similar tracks fetched for {genre}")
+        for key in stale:
+            cache_store.set(key, tracks, CACHE_DURATION, CACHE_MAX_STALE)
+
+    cost = SIMILAR_SEARCHES * UNIT_COSTS['search.list'] + UNIT_COSTS['videos.list']
+    return WarmJob(f"similar {genre} ({len(stale)} buckets)", cost, run)
+
+def keyword_job(genre: str, bpm: int, planned: Set[str]) -> Optional[WarmJob]:
+    """Metrics for the genre keyword set at one BPM; analyze_keywords only fetches the stale ones
+
+    Keywords in `planned` are left to the earlier job that fetches them.
+    """
+    features = {'bpm': bpm}
+    stale = [k for k in generate_candidates(genre, features)
+             if k not in planned and not cache_store.is_fresh(f"kwmetrics_{k}")]
+    if not stale:
+        return None
+    planned.update(stale)
+
+    def run():
+        # analyze_keywords falls back to cached metrics, so check the stale ones were actually refreshed
+        analyze_keywords(genre, features, essential=False)
+        unfetched = [k for k in stale if not cache_store.is_fresh(f"kwmetrics_{k}")]
+        if unfetched:
+            raise RuntimeError(f"{len(unfetched)} keyword metrics not fetched for {genre} at {bpm} bpm")
+
+    cost = len(stale) * UNIT_COSTS['search.list'] + UNIT_COSTS['videos.list']
+    return WarmJob(f"keywords {genre} {bpm} bpm ({len(stale)} keywords)", cost, run)
+
+def pending_jobs(genres: Optional[List[str]] = None) -> List[WarmJob]:
+    """Jobs for every entry that is missing or stale, similar tracks first"""
+    genres = genres or list(GENRE_BPM_RANGES)
+    jobs = []
+    # The offline track index answers similar-track lookups without the API
+    index = get_track_index()
+    if index is None or not len(index):
+        jobs += [similar_job(genre) for genre in genres]
+    # Jobs run in order, so keyword sets that overlap only pay for what's new
+    planned = set()
+    for genre in genres:
+        low, high = GENRE_BPM_RANGES[genre]
+        jobs += [keyword_job(genre, bpm, planned) for bpm in range(low, high + 1)]
+    return [job for job in jobs if job is not None]
+
+def within_budget(jobs: List[WarmJob], budget: int) -> List[WarmJob]:
+    """Jobs that fit in `budget` units, in order; ones that don't fit are passed over for cheaper later ones"""
+    selected, spent = [], 0
+    for job in jobs:
+        if spent + job.cost <= budget:
+            selected.append(job)
+            spent += job.cost
+    return selected
+
+def warm_caches(window: float = 0.0, genres: Optional[List[str]] = None,
+                stop: Optional[threading.Event] = None, budget_share: float = WARMER_BUDGET_SHARE) -> Dict[str, int]:
+    """Run pending jobs spaced evenly over `window` seconds, spending at most `budget_share` of the quota left
+
+    Calls go out as non-essential, so the key manager also keeps the essential reserve untouched.
+    """
+    stop = stop or threading.Event()
+    manager = get_key_manager()
+    pending = pending_jobs(genres)
+    budget = int(manager.remaining() * budget_share)
+    jobs = within_budget(pending, budget)
+    delay = window / len(jobs) if jobs else 0.0
+    summary = {'jobs': len(pending), 'done': 0, 'failed': 0, 'skipped': len(pending) - len(jobs), 'units': 0}
+    logger.info(f"Cache warmer: {len(jobs)} of {len(pending)} jobs within a {budget} unit budget over {window:.0f}s")
+
+    for i, job in enumerate(jobs):
+        if i and stop.wait(delay):
+            break
+        if manager.remaining() - job.cost < manager.reserve():
+            logger.info(f"Cache warmer: skipping {job.name}, quota is down to the essential reserve")
+            summary['skipped'] += 1
+            continue
+        try:
+            job.run()
+            summary['done'] += 1
+            summary['units'] += job.cost
+        except Exception as e:
+            logger.warning(f"Cache warmer: {job.name} failed: {str(e)}")
+            summary['failed'] += 1
+    return summary
+
+def _warm_forever(stop: threading.Event) -> None:
+    while not stop.is_set():
+        # Entries go stale within a day, so each cycle covers the rest of the quota day
+        window = max(seconds_until_reset(), MIN_CYCLE_SECONDS)
+        started = time.monotonic()
+        try:
+            warm_caches(window, stop=stop)
+        except Exception as e:
+            logger.error(f"Cache warmer cycle failed: {str(e)}")
+        stop.wait(max(window - (time.monotonic() - started), MIN_CYCLE_SECONDS))
+
+_warmer: Optional[threading.Thread] = None
+_warmer_stop = threading.Event()
+_warmer_lock = threading.Lock()
+
+def start_cache_warmer() -> threading.Thread:
+    """Process-wide background warmer thread, started once"""
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None or not _warmer.is_alive():
+            _warmer_stop.clear()
+            _warmer = threading.Thread(target=_warm_forever, args=(_warmer_stop,), name="cache-warmer", daemon=True)
+            _warmer.start()
+        return _warmer
+
+def stop_cache_warmer() -> None:
+    _warmer_stop.set()
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Prefetch similar tracks and keyword metrics for every genre")
+    parser.add_argument('--genre', action='append', choices=list(GENRE_BPM_RANGES), help="Only these genres")
+    parser.add_argument('--window', type=float, help="Seconds to spread calls over (default: until the quota resets)")
+    parser.add_argument('--now', action='store_true', help="Run all jobs back to back")
+    parser.add_argument('--budget', type=float, default=WARMER_BUDGET_SHARE,
+                        help=f"Share of today's remaining quota to spend (default: {WARMER_BUDGET_SHARE})")
+    parser.add_argument('--dry-run', action='store_true', help="List pending jobs and their cost")
+    args = parser.parse_args(argv)
+    if not 0.0 <= args.budget <= 1.0:
+        parser.error("--budget must be between 0 and 1")
+
+    if args.dry_run:
+        jobs = pending_jobs(args.genre)
+        remaining = get_key_manager().remaining()
+        budget = int(remaining * args.budget)
+        selected = within_budget(jobs, budget)
+        for job in jobs:
+            print(f"{job.cost:>6} units  {'' if job in selected else '(over budget) '}{job.name}")
+        print(f"{len(jobs)} jobs, {sum(job.cost for job in jobs)} units; {remaining} left today, "
+              f"budget {budget} covers {len(selected)} jobs ({sum(job.cost for job in selected)} units)")
+        return
+
+    window = 0.0 if args.now else args.window if args.window is not None else seconds_until_reset()
+    summary = warm_caches(window, args.genre, budget_share=args.budget)
+    get_key_manager().flush()
+    print(f"Warmed {summary['done']}/{summary['jobs']} jobs ({summary['units']} units), "
+          f"{summary['failed']} failed, {summary['skipped']} skipped for quota or budget")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
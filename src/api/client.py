@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest, build_http
+import streamlit as st
+from src.api.fake_youtube import RECORD_API_ENV, RecordingHttp, get_fake_http
+from src.utlis.api_key_manager import UNIT_COSTS, get_key_manager
+from src.utlis.telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+MAX_IDLE_CLIENTS = 8
+
+_discovery_doc: Optional[Dict] = None
+_pools: Dict[str, 'YouTubeClientPool'] = {}
+_lock = threading.Lock()
+
+def get_discovery_document() -> Dict:
+    """YouTube v3 discovery document shipped with google-api-python-client, parsed once"""
+    global _discovery_doc
+    with _lock:
+        if _discovery_doc is None:
+            _discovery_doc = json.loads(get_static_doc('youtube', 'v3'))
+        return _discovery_doc
+
+def handle_quota_error(e: Exception) -> bool:
+    """Check if error is due to quota exceeded"""
+    error_message = str(e).lower()
+    return 'quota' in error_message or 'rate limit' in error_message
+
+def classify_error(e: Exception) -> str:
+    """Coarse error class for telemetry"""
+    if handle_quota_error(e):
+        return "quota"
+    if isinstance(e, HttpError):
+        return f"http_{e.resp.status}"
+    return type(e).__name__
+
+@contextmanager
+def track_call(method: str, count: int = 1) -> Iterator[Dict]:
+    """Record latency, quota units, result items and outcomes for `count` calls of `method`
+
+    Batches list the error class of each request that failed inside them in call['errors'].
+    """
+    call = {'items': 0, 'errors': []}
+    outcomes = None
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        outcomes = {classify_error(e): count}
+        raise
+    finally:
+        if outcomes is None:
+            outcomes = Counter(call['errors'])
+            if count > len(call['errors']):
+                outcomes['ok'] = count - len(call['errors'])
+        # Failed calls are still charged against quota
+        telemetry.record_call(method, time.perf_counter() - start, UNIT_COSTS.get(method, 0) * count,
+                              call['items'], outcomes=dict(outcomes))
+
+class InstrumentedHttpRequest(HttpRequest):
+    """HttpRequest whose execute() is recorded by track_call"""
+
+    def execute(self, http=None, num_retries=0):
+        method = self.methodId.split('.', 1)[-1] if self.methodId else "unknown"
+        with track_call(method) as call:
+            response = super().execute(http=http, num_retries=num_retries)
+            if isinstance(response, dict):
+                call['items'] = len(response.get('items', []))
+            return response
+
+def build_transport():
+    """The local fake if enabled, else a real transport (recording responses if YOUTUBE_RECORD_API is set)"""
+    fake = get_fake_http()
+    if fake is not None:
+        return fake
+    http = build_http()
+    if os.environ.get(RECORD_API_ENV):
+        http = RecordingHttp(http, os.environ[RECORD_API_ENV])
+    return http
+
+def build_client(api_key: str):
+    """Build a YouTube client from the cached discovery document, never over the network"""
+    # Each client owns its httplib2 transport, which keeps its connections alive
+    return build_from_document(get_discovery_document(), developerKey=api_key, http=build_transport(),
+                               requestBuilder=InstrumentedHttpRequest)
+
+class YouTubeClientPool:
+    """Hands out one client per concurrent user; httplib2 transports are not thread-safe"""
+
+    def __init__(self, api_key: str, max_idle: int = MAX_IDLE_CLIENTS):
+        self.api_key = api_key
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+
+    @contextmanager
+    def client(self) -> Iterator[object]:
+        try:
+            youtube = self._idle.get_nowait()
+        except queue.Empty:
+            youtube = build_client(self.api_key)
+        try:
+            yield youtube
+        finally:
+            try:
+                self._idle.put_nowait(youtube)
+            except queue.Full:
+                pass
+
+def get_client_pool(api_key: str) -> 'YouTubeClientPool':
+    """Process-wide client pool for an API key"""
+    with _lock:
+        if api_key not in _pools:
+            _pools[api_key] = YouTubeClientPool(api_key)
+        return _pools[api_key]
+
+def get_api_key() -> Optional[str]:
+    """YouTube API key from Streamlit secrets"""
+    api_key = st.secrets.get("YOUTUBE_API_KEY")
+    if not api_key:
+        st.error("YouTube API key not found in Streamlit secrets")
+    return api_key
+
+@contextmanager
+def youtube_client(method: str, count: int = 1, essential: bool = True) -> Iterator[Optional[object]]:
+    """Pooled client on the key with the most quota left, charged for `count` calls of `method`
+
+    Yields None when no key is configured or none has budget for the call.
+    """
+    key_manager = get_key_manager()
+    if not key_manager.keys:
+        st.error("YouTube API key not found in Streamlit secrets")
+        yield None
+        return
+
+    api_key = key_manager.acquire(method, count, essential)
+    if not api_key:
+        yield None
+        return
+
+    with get_client_pool(api_key).client() as youtube:
+        try:
+            yield youtube
+        except Exception as e:
+            if handle_quota_error(e):
+                key_manager.mark_exhausted(api_key)
+            raise
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, fields
+from email.parser import Parser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+import httplib2
+
+logger = logging.getLogger(__name__)
+
+FAKE_API_ENV = "YOUTUBE_FAKE_API"
+RECORD_API_ENV = "YOUTUBE_RECORD_API"  # directory to record live responses into
+ENDPOINTS = ("search", "videos")
+OPTION_TYPES = {"recordings_dir": str, "seed": int}  # other options are floats
+
+@dataclass
+class FakeAPIConfig:
+    """Behaviour of the local YouTube Data API stand-in"""
+    latency: float = 0.05  # seconds per HTTP round trip (a batch is one round trip)
+    jitter: float = 0.5  # +/- fraction of latency
+    error_rate: float = 0.0  # share of requests failing with HTTP 500
+    quota_error_rate: float = 0.0  # share of requests failing with 403 quotaExceeded
+    recordings_dir: Optional[str] = None  # recorded responses, served in place of generated ones
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_env(cls, value: str) -> 'FakeAPIConfig':
+        """Parse "1" or "latency=0.2,error_rate=0.05,recordings_dir=cache/recordings" """
+        config = cls()
+        names = {f.name for f in fields(cls)}
+        for pair in value.split(","):
+            if "=" not in pair:
+                continue
+            name, raw = (part.strip() for part in pair.split("=", 1))
+            if name not in names:
+                raise ValueError(f"Unknown fake API option: {name}")
+            parse = OPTION_TYPES.get(name, float)
+            setattr(config, name, parse(raw))
+        return config
+
+def _digest(*parts) -> int:
+    return int(hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest(), 16)
+
+def recording_name(endpoint: str, params: Dict[str, str]) -> str:
+    """File name for a recorded response; the API key is not part of it"""
+    query = sorted((k, v) for k, v in params.items() if k != "key")
+    return f"{endpoint}_{_digest(*query) % 16 ** 12:012x}.json"
+
+def parse_batch(body: str, content_type: str) -> List[Tuple[str, str]]:
+    """(Content-ID, target URL) of each request in a multipart/mixed batch body"""
+    message = Parser().parsestr(f"Content-Type: {content_type}\r\n\r\n{body}")
+    requests = []
+    for part in message.get_payload():
+        request_line = part.get_payload().split("\n", 1)[0].strip()
+        _, target, _ = request_line.split(" ", 2)
+        requests.append((part["Content-ID"][1:-1], target))
+    return requests
+
+def generate_search(params: Dict[str, str]) -> Dict:
+    """Deterministic search.list response for a query"""
+    q = params.get("q", "")
+    seed = _digest("search", q, params.get("channelId", ""))
+    items = []
+    for i in range(int(params.get("maxResults", 5))):
+        video_id = f"{_digest(seed, i) % 16 ** 11:011x}"
+        items.append({
+            "kind": "youtube#searchResult",
+            "id": {"kind": "youtube#video", "videoId": video_id},
+            "snippet": {
+                "title": f"{q.title() or 'Untitled'} - Track {i + 1} (Official Audio)",
+                "channelTitle": f"Fake Channel {seed % 7 + 1}",
+                "thumbnails": {"medium": {"url": f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg"}},
+            },
+        })
+    return {
+        "kind": "youtube#searchListResponse",
+        "pageInfo": {"totalResults": seed % 50000 + 100, "resultsPerPage": len(items)},
+        "items": items,
+    }
+
+def generate_videos(params: Dict[str, str]) -> Dict:
+    """Deterministic videos.list statistics for each requested ID"""
+    items = []
+    for video_id in filter(None, params.get("id", "").split(",")):
+        views = _digest("views", video_id) % 5000000
+        items.append({
+            "kind": "youtube#video",
+            "id": video_id,
+            "statistics": {"viewCount": str(views), "likeCount": str(views // (_digest("likes", video_id) % 80 + 20))},
+        })
+    return {"kind": "youtube#videoListResponse", "pageInfo": {"totalResults": len(items)}, "items": items}
+
+GENERATORS = {"search": generate_search, "videos": generate_videos}
+
+QUOTA_ERROR = {"error": {
+    "code": 403,
+    "message": "The request cannot be completed because you have exceeded your quota.",
+    "errors": [{"message": "quota exceeded", "domain": "youtube.quota", "reason": "quotaExceeded"}],
+}}
+BACKEND_ERROR = {"error": {
+    "code": 500,
+    "message": "Backend Error",
+    "errors": [{"message": "Backend Error", "domain": "global", "reason": "backendError"}],
+}}
+
+class FakeYouTubeHttp:
+    """httplib2.Http stand-in answering search.list and videos.list (single or batched) locally"""
+
+    def __init__(self, config: FakeAPIConfig):
+        self.config = config
+        self.calls = Counter()  # per endpoint, counting each request inside a batch
+        self.round_trips = 0
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+
+    def _sleep(self) -> None:
+        with self._lock:
+            jitter = self._rng.uniform(-self.config.jitter, self.config.jitter)
+        time.sleep(max(self.config.latency * (1 + jitter), 0.0))
+
+    def _answer(self, path: str, query: str) -> Tuple[int, Dict]:
+        endpoint = path.rstrip("/").rsplit("/", 1)[-1]
+        params = dict(parse_qsl(query))
+        with self._lock:
+            self.calls[endpoint] += 1
+            roll = self._rng.random()
+        if endpoint not in GENERATORS:
+            return 404, {"error": {"code": 404, "message": f"Fake API has no {endpoint} endpoint"}}
+        if roll < self.config.quota_error_rate:
+            return 403, QUOTA_ERROR
+        if roll < self.config.quota_error_rate + self.config.error_rate:
+            return 500, BACKEND_ERROR
+
+        if self.config.recordings_dir:
+            path = os.path.join(self.config.recordings_dir, recording_name(endpoint, params))
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    return 200, json.load(f)
+        return 200, GENERATORS[endpoint](params)
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=None, connection_type=None):
+        with self._lock:
+            self.round_trips += 1
+        self._sleep()
+        headers = headers or {}
+        parsed = urlparse(uri)
+        if parsed.path.startswith("/batch"):
+            return self._batch(body, headers.get("content-type", ""))
+
+        status, payload = self._answer(parsed.path, parsed.query)
+        return httplib2.Response({"status": status, "content-type": "application/json"}), json.dumps(payload).encode()
+
+    def _batch(self, body: str, content_type: str) -> Tuple[httplib2.Response, bytes]:
+        """Answer a multipart/mixed batch the way googleapiclient's BatchHttpRequest expects"""
+        boundary = "fake_batch_boundary"
+        parts = []
+        for content_id, target in parse_batch(body, content_type):
+            parsed = urlparse(target)
+            status, payload = self._answer(parsed.path, parsed.query)
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json\r\n\r\n{json.dumps(payload)}\r\n"
+            )
+        content = "".join(parts) + f"--{boundary}--\r\n"
+        response = httplib2.Response({"status": 200, "content-type": f"multipart/mixed; boundary={boundary}"})
+        return response, content.encode()
+
+class RecordingHttp:
+    """Wraps a real transport and saves successful search/videos responses for replay by the fake
+
+    Requests inside a batch are saved one by one under the same names, which is how the fake replays them.
+    """
+
+    def __init__(self, http, recordings_dir: str):
+        self.http = http
+        self.recordings_dir = recordings_dir
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        response, content = self.http.request(uri, method=method, body=body, headers=headers, **kwargs)
+        if response.status == 200:
+            if urlparse(uri).path.startswith("/batch"):
+                self._record_batch(body, (headers or {}).get("content-type", ""), response, content)
+            else:
+                self._record(uri, content)
+        return response, content
+
+    def _record(self, target: str, content: bytes) -> None:
+        parsed = urlparse(target)
+        endpoint = parsed.path.rstrip("/").rsplit("/", 1)[-1]
+        if endpoint not in ENDPOINTS:
+            return
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        path = os.path.join(self.recordings_dir, recording_name(endpoint, dict(parse_qsl(parsed.query))))
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    def _record_batch(self, body, content_type: str, response, content: bytes) -> None:
+        """Match each successful part of a batch response to its request by Content-ID"""
+        if isinstance(body, bytes):
+            body = body.decode()
+        targets = dict(parse_batch(body, content_type))
+        message = Parser().parsestr(f"Content-Type: {response['content-type']}\r\n\r\n{content.decode()}")
+        for part in message.get_payload():
+            # Each part is an HTTP response: status line, headers, blank line, JSON body
+            status_line, _, rest = part.get_payload().partition("\n")
+            head_and_body = re.split(r"\r?\n\r?\n", rest, maxsplit=1)
+            target = targets.get(part["Content-ID"][1:-1].replace("response-", "", 1))
+            if status_line.split(" ")[1] == "200" and target and len(head_and_body) == 2:
+                self._record(target, head_and_body[1].strip().encode())
+
+_fake_http: Optional[FakeYouTubeHttp] = None
+
+def enable_fake_api(config: Optional[FakeAPIConfig] = None) -> FakeYouTubeHttp:
+    """Point clients built from now on at a local stand-in instead of googleapis.com"""
+    global _fake_http
+    _fake_http = FakeYouTubeHttp(config or FakeAPIConfig())
+    logger.info("YouTube API calls are served by the local fake")
+    return _fake_http
+
+def get_fake_http() -> Optional[FakeYouTubeHttp]:
+    """The active stand-in, if any"""
+    return _fake_http
+
+if os.environ.get(FAKE_API_ENV):
+    enable_fake_api(FakeAPIConfig.from_env(os.environ[FAKE_API_ENV]))
@@ -1,10 +1,18 @@
-from googleapiclient.discovery import build
 import streamlit as st
+import numpy as np
+import logging
 from typing import Dict, List, Optional
 import time
-import json
-import os
-from datetime import datetime, timedelta
+from src.api.client import classify_error, handle_quota_error, track_call, youtube_client
+from src.api.youtube import (video_stats, get_competition_level, estimate_monthly_searches, get_cached_data, save_to_cache,
+                             CACHE_DURATION, CACHE_MAX_STALE)
+from src.api.suggestion_index import get_suggestion_index
+from src.api.youtube_seo import generate_seo_tags
+from src.utlis.api_key_manager import get_key_manager
+from src.utlis.cache_store import cache_store
+from src.utlis.rate_limiter import youtube_rate_limiter
+
+logger = logging.getLogger(__name__)
 
 # Define EDM Labels dictionary
 EDM_LABELS = {
@@ -38,37 +46,138 @@ EDM_LABELS = {
     ]
 }
 
-# Cache configuration
-CACHE_DIR = "cache"
-CACHE_DURATION = timedelta(hours=24)
-
-def get_cache_path(key: str) -> str:
-    """Get cache file path for a key"""
-    if not os.path.exists(CACHE_DIR):
-        os.makedirs(CACHE_DIR)
-    return os.path.join(CACHE_DIR, f"{key.replace(' ', '_')}.json")
-
-def get_cached_data(key: str) -> Dict:
-    """Get data from cache if valid"""
-    cache_path = get_cache_path(key)
-    if os.path.exists(cache_path):
-        with open(cache_path, 'r') as f:
-            data = json.load(f)
-            if datetime.fromisoformat(data['timestamp']) + CACHE_DURATION > datetime.now():
-                return data['content']
-    return None
+# Keyword ranking configuration
+MAX_CANDIDATES = 20
+TOP_K_KEYWORDS = 10
+SEARCH_BATCH_SIZE = 50
+
+def generate_candidates(genre: str, track_features: dict) -> List[str]:
+    """Candidate keywords for a track, seeded from its SEO tags and the genre's labels"""
+    genre_term = genre.lower()
+    candidates = list(generate_seo_tags(genre, track_features)["keywords"])
+    candidates += [f"{label.lower()} {genre_term}" for label in EDM_LABELS.get(genre, [])]
+    candidates += [genre_term, f"{genre_term} {track_features.get('bpm', '128')} bpm"]
+    # Only with the track's own key and energy; callers like the cache warmer pass just a BPM
+    if track_features.get('key'):
+        candidates.append(f"{genre_term} {track_features['key'].lower()}")
+    if track_features.get('energy'):
+        candidates.append(f"{genre_term} {track_features['energy'].lower()} energy")
+    candidates.append(f"new {genre_term}")
+    # Dedupe, keeping the first (most specific) occurrence
+    return list(dict.fromkeys(c for c in candidates if c))[:MAX_CANDIDATES]
+
+def fetch_keyword_metrics(keywords: List[str], youtube) -> Dict[str, Dict]:
+    """Search volume and top-video metrics for many keywords via batched API requests"""
+    searches = {}
+    failures = []
+    suggestion_index = get_suggestion_index()
+
+    def on_search(request_id, response, exception):
+        if exception is not None:
+            logger.warning(f"Keyword search failed for '{keywords[int(request_id)]}': {str(exception)}")
+            failures.append(exception)
+            return
+        searches[keywords[int(request_id)]] = response
+        suggestion_index.add_search_response(response)
+
+    for start in range(0, len(keywords), SEARCH_BATCH_SIZE):
+        batch = youtube.new_batch_http_request(callback=on_search)
+        for i in range(start, min(start + SEARCH_BATCH_SIZE, len(keywords))):
+            batch.add(youtube.search().list(
+                q=keywords[i],
+                part='snippet',
+                type='video',
+                videoCategoryId='10',
+                maxResults=5,
+                regionCode='US'
+            ), request_id=str(i))
+        youtube_rate_limiter.acquire()
+        # Batched requests bypass HttpRequest.execute, so record them here
+        chunk = keywords[start:start + SEARCH_BATCH_SIZE]
+        del failures[:]
+        with track_call('search.list', count=len(chunk)) as call:
+            batch.execute()
+            call['items'] = sum(len(searches[k].get('items', [])) for k in chunk if k in searches)
+            call['errors'] = [classify_error(e) for e in failures]
+        # Errors inside a batch only reach the callback; re-raise quota errors so youtube_client retires the key
+        quota_error = next((e for e in failures if handle_quota_error(e)), None)
+        if quota_error is not None:
+            raise quota_error
+
+    # One statistics lookup for every video across all keywords
+    video_ids = {
+        keyword: [item['id']['videoId'] for item in response.get('items', [])]
+        for keyword, response in searches.items()
+    }
+    statistics = video_stats.get_statistics(vid for ids in video_ids.values() for vid in ids)
 
-def save_to_cache(key: str, content: Dict) -> None:
-    """Save data to cache"""
-    cache_path = get_cache_path(key)
-    with open(cache_path, 'w') as f:
-        json.dump({
-            'timestamp': datetime.now().isoformat(),
-            'content': content
-        }, f)
+    metrics = {}
+    for keyword, response in searches.items():
+        stats = [statistics.get(vid, {}) for vid in video_ids[keyword]]
+        views = sum(int(s.get('viewCount', 0)) for s in stats)
+        likes = sum(int(s.get('likeCount', 0)) for s in stats)
+        metrics[keyword] = {
+            'total_results': response['pageInfo']['totalResults'],
+            'avg_views': views / len(stats) if stats else 0,
+            'engagement': likes / views if views > 0 else 0
+        }
+    return metrics
 
-def analyze_keywords(genre: str, track_features: dict) -> dict:
-    return {}
+def calculate_keyword_scores(avg_views: np.ndarray, total_results: np.ndarray, engagement: np.ndarray) -> np.ndarray:
+    """Vectorized calculate_keyword_score over arrays of candidates (0-100)"""
+    view_score = np.minimum(avg_views / 100000, 1.0) * 40
+    competition_score = (1 - np.minimum(total_results / 10000, 1.0)) * 30
+    engagement_score = np.minimum(engagement * 100, 1.0) * 30
+    return view_score + competition_score + engagement_score
+
+def analyze_keywords(genre: str, track_features: dict, top_k: int = TOP_K_KEYWORDS, cache_only: bool = False,
+                     essential: bool = True) -> dict:
+    """Rank candidate keywords for a track by potential score; cache_only ranks just the already-cached ones
+
+    Only as many missing keywords are fetched as the quota allows (non-essential lookups stop at the
+    essential reserve); whatever can't be fetched is left out and the cached ones are still ranked.
+    """
+    candidates = generate_candidates(genre, track_features)
+
+    # Per-keyword metrics are cached, so overlapping candidate sets only fetch what's new
+    metrics = {}
+    for keyword in candidates:
+        cached = get_cached_data(f"kwmetrics_{keyword}")
+        if cached:
+            metrics[keyword] = cached
+
+    # Candidates are most specific first, so a short budget goes to the best ones
+    missing = [] if cache_only else [keyword for keyword in candidates if keyword not in metrics]
+    missing = missing[:get_key_manager().affordable('search.list', essential)] if missing else []
+    if missing:
+        try:
+            with youtube_client('search.list', count=len(missing), essential=essential) as youtube:
+                fetched = fetch_keyword_metrics(missing, youtube) if youtube else {}
+        except Exception as e:
+            logger.error(f"Keyword metrics fetch failed, ranking cached keywords only: {str(e)}")
+            fetched = {}
+        for keyword, values in fetched.items():
+            save_to_cache(f"kwmetrics_{keyword}", values)
+        metrics.update(fetched)
+
+    keywords = [keyword for keyword in candidates if keyword in metrics]
+    if not keywords:
+        return {}
+
+    total_results = np.array([metrics[k]['total_results'] for k in keywords], dtype=float)
+    avg_views = np.array([metrics[k]['avg_views'] for k in keywords], dtype=float)
+    engagement = np.array([metrics[k]['engagement'] for k in keywords], dtype=float)
+    scores = calculate_keyword_scores(avg_views, total_results, engagement) / 100
+
+    keyword_stats = {
+        keyword: {
+            'score': float(scores[i]),
+            'competition': get_competition_level(int(total_results[i])),
+            'monthly_searches': estimate_monthly_searches(int(total_results[i]))
+        }
+        for i, keyword in enumerate(keywords)
+    }
+    return dict(list(sort_keywords(keyword_stats).items())[:top_k])
 
 def get_fallback_data() -> dict:
     return {
@@ -122,15 +231,22 @@ def sort_keywords(keyword_stats: Dict) -> Dict:
 def analyze_keyword_realtime(keyword: str) -> Optional[Dict]:
     """Analyze a single keyword in real-time"""
     try:
-        # Check cache first
-        cache_key = f"realtime_{keyword}"
-        cached_data = get_cached_data(cache_key)
-        if cached_data:
-            return cached_data
+        # Stale results are served immediately and refreshed in the background
+        return cache_store.get_or_refresh(
+            f"realtime_{keyword}", lambda: fetch_realtime_metrics(keyword),
+            CACHE_DURATION, CACHE_MAX_STALE
+        )
 
-        youtube = build('youtube', 'v3', developerKey=st.secrets["YOUTUBE_API_KEY"])
-        
-        # Search for videos with this keyword
+    except Exception as e:
+        st.error(f"Real-time keyword analysis error: {str(e)}")
+        return None
+
+def fetch_realtime_metrics(keyword: str) -> Optional[Dict]:
+    """Live search and statistics metrics for a single keyword"""
+    # Search for videos with this keyword
+    with youtube_client('search.list') as youtube:
+        if not youtube:
+            return None
         search_response = youtube.search().list(
             q=keyword,
             part='snippet',
@@ -139,48 +255,40 @@ def analyze_keyword_realtime(keyword: str) -> Optional[Dict]:
             maxResults=5,
             regionCode='US'
         ).execute()
+    get_suggestion_index().add_search_response(search_response)
+    
+    total_results = search_response['pageInfo']['totalResults']
+    
+    # Get video statistics
+    video_ids = [item['id']['videoId'] for item in search_response['items']]
+    if video_ids:
+        video_statistics = video_stats.get_statistics(video_ids)
         
-        total_results = search_response['pageInfo']['totalResults']
+        # Calculate average views and engagement
+        views = []
+        likes = []
+        for stats in video_statistics.values():
+            views.append(int(stats.get('viewCount', 0)))
+            likes.append(int(stats.get('likeCount', 0)))
         
-        # Get video statistics
-        video_ids = [item['id']['videoId'] for item in search_response['items']]
-        if video_ids:
-            videos_response = youtube.videos().list(
-                part='statistics',
-                id=','.join(video_ids)
-            ).execute()
-            
-            # Calculate average views and engagement
-            views = []
-            likes = []
-            for video in videos_response['items']:
-                stats = video['statistics']
-                views.append(int(stats.get('viewCount', 0)))
-                likes.append(int(stats.get('likeCount', 0)))
-            
-            avg_views = sum(views) / len(views) if views else 0
-            engagement = sum(likes) / sum(views) if sum(views) > 0 else 0
-            
-            # Calculate keyword metrics
-            score = calculate_keyword_score(avg_views, total_results, engagement)
-            competition = get_competition_level(total_results)
-            monthly_searches = estimate_monthly_searches(total_results)
-            
-            result = {
-                'score': score,
-                'competition': competition,
-                'monthly_searches': monthly_searches,
-                'avg_views': int(avg_views),
-                'engagement_rate': f"{engagement*100:.1f}%"
-            }
-            
-            # Cache the result
-            save_to_cache(cache_key, result)
-            return result
-            
-    except Exception as e:
-        st.error(f"Real-time keyword analysis error: {str(e)}")
-        return None
+        avg_views = sum(views) / len(views) if views else 0
+        engagement = sum(likes) / sum(views) if sum(views) > 0 else 0
+        
+        # Calculate keyword metrics
+        score = calculate_keyword_score(avg_views, total_results, engagement)
+        competition = get_competition_level(total_results)
+        monthly_searches = estimate_monthly_searches(total_results)
+        
+        result = {
+            'score': score,
+            'competition': competition,
+            'monthly_searches': monthly_searches,
+            'avg_views': int(avg_views),
+            'engagement_rate': f"{engagement*100:.1f}%"
+        }
+        
+        return result
+    return None
 
 def calculate_keyword_score(avg_views: float, total_results: int, engagement: float) -> float:
     """Calculate keyword potential score (0-100)"""
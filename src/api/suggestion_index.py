@@ -0,0 +1,173 @@
+import atexit
+import hashlib
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+from src.utlis.cache_store import cache_store
+
+logger = logging.getLogger(__name__)
+
+SUGGESTIONS_FILE = os.path.join("cache", "suggestions.json")
+NGRAM_SIZES = (2, 3)
+SAVE_INTERVAL = 60.0
+# Title boilerplate that makes poor keywords
+STOPWORDS = {
+    "official", "audio", "video", "music", "lyric", "lyrics", "visualizer", "visualiser", "hd", "4k",
+    "ft", "feat", "featuring", "x", "vs", "the", "a", "an", "of", "and", "&", "-", "|", "out", "now",
+}
+
+def tokenize(title: str) -> List[str]:
+    """Lowercase words with brackets, punctuation and boilerplate removed"""
+    title = re.sub(r"[\(\[\{].*?[\)\]\}]", " ", title.lower())
+    return [word for word in re.findall(r"[a-z0-9']+", title) if word not in STOPWORDS]
+
+def title_ngrams(title: str) -> Counter:
+    """2- and 3-word phrases in a title, each counted once"""
+    words = tokenize(title)
+    return Counter({" ".join(words[i:i + n]) for n in NGRAM_SIZES for i in range(len(words) - n + 1)})
+
+def _title_id(title: str) -> str:
+    return hashlib.sha1(title.strip().lower().encode()).hexdigest()[:16]
+
+class SuggestionIndex:
+    """Phrase frequencies from video titles behind a prefix trie, persisted and merged across processes"""
+
+    def __init__(self, path: str = SUGGESTIONS_FILE):
+        self.path = path
+        self.counts = Counter()
+        self._titles = set()
+        self._pending: List[str] = []  # titles added since the last save
+        self._trie: Dict = {}
+        self._last_save = time.monotonic()
+        self._lock = threading.Lock()
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not load suggestion index: {str(e)}")
+            return
+        self.counts = Counter(data.get('ngrams', {}))
+        self._titles = set(data.get('titles', []))
+        self._trie = {}
+        for phrase in self.counts:
+            self._insert(phrase)
+
+    def _insert(self, phrase: str) -> None:
+        node = self._trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[None] = phrase  # terminal marker
+
+    def add_titles(self, titles: Iterable[str]) -> int:
+        """Count phrases from titles not seen before; returns how many were new"""
+        added = 0
+        with self._lock:
+            for title in titles:
+                title_id = _title_id(title)
+                if not title or title_id in self._titles:
+                    continue
+                self._titles.add(title_id)
+                self._pending.append(title)
+                for phrase in title_ngrams(title):
+                    if phrase not in self.counts:
+                        self._insert(phrase)
+                    self.counts[phrase] += 1
+                added += 1
+        if added and time.monotonic() - self._last_save >= SAVE_INTERVAL:
+            self.flush()
+        return added
+
+    def add_search_response(self, response: Dict) -> None:
+        """Index the titles of a search.list response"""
+        self.add_titles(item['snippet']['title'] for item in response.get('items', []) if 'snippet' in item)
+
+    def suggest(self, prefix: str, limit: int = 5) -> List[str]:
+        """Most frequent indexed phrases starting with the prefix, excluding the prefix itself"""
+        prefix = " ".join(tokenize(prefix)) if prefix.strip() else ""
+        if not prefix:
+            return []
+        with self._lock:
+            node = self._trie
+            for char in prefix:
+                node = node.get(char)
+                if node is None:
+                    return []
+            phrases = []
+            stack = [node]
+            while stack:
+                current = stack.pop()
+                for char, child in current.items():
+                    if char is None:
+                        if child != prefix:
+                            phrases.append(child)
+                    else:
+                        stack.append(child)
+            return heapq.nlargest(limit, phrases, key=lambda phrase: (self.counts[phrase], -len(phrase)))
+
+    def flush(self) -> None:
+        """Merge titles added since the last save into the file, picking up other processes' additions"""
+        with self._lock:
+            self._last_save = time.monotonic()
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            try:
+                counts, titles = Counter(), set()
+                if os.path.exists(self.path):
+                    with open(self.path, 'r') as f:
+                        data = json.load(f)
+                    counts, titles = Counter(data.get('ngrams', {})), set(data.get('titles', []))
+                for title in pending:
+                    title_id = _title_id(title)
+                    if title_id not in titles:
+                        titles.add(title_id)
+                        counts.update(title_ngrams(title))
+
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump({'ngrams': counts, 'titles': sorted(titles)}, f)
+                os.replace(tmp_path, self.path)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Could not save suggestion index: {str(e)}")
+                self._pending = pending + self._pending
+                return
+
+            # Adopt the merged view, including phrases other processes contributed
+            for phrase in counts.keys() - self.counts.keys():
+                self._insert(phrase)
+            self.counts = counts
+            self._titles |= titles
+
+_suggestion_index: Optional[SuggestionIndex] = None
+_suggestion_index_lock = threading.Lock()
+
+def cached_titles() -> Iterable[str]:
+    """Titles in cached results, e.g. similar_* track lists"""
+    for value in cache_store.values():
+        if isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict) and isinstance(item.get('title'), str):
+                    yield item['title']
+
+def get_suggestion_index() -> SuggestionIndex:
+    """Process-wide suggestion index, seeded from the cache on first use"""
+    global _suggestion_index
+    with _suggestion_index_lock:
+        if _suggestion_index is None:
+            _suggestion_index = SuggestionIndex()
+            if not _suggestion_index.counts:
+                _suggestion_index.add_titles(cached_titles())
+        return _suggestion_index
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+from typing import Callable, ContextManager, Dict, Iterable, List, Optional
+from src.utlis.rate_limiter import youtube_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 50  # videos.list accepts at most 50 IDs per call
+STATS_TTL = timedelta(hours=6)
+LINGER_SECONDS = 0.02
+MAX_CACHED_VIDEOS = 10000
+
+class VideoStatsService:
+    """Coalesces videos.list(part='statistics') lookups across callers, with a per-video TTL cache"""
+
+    def __init__(self, client_factory: Callable[[], ContextManager[Optional[object]]], ttl: timedelta = STATS_TTL,
+                 linger: float = LINGER_SECONDS):
+        self.client_factory = client_factory
+        self.ttl = ttl.total_seconds()
+        self.linger = linger
+        self._cache: Dict[str, tuple] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._queue: List[str] = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def get_statistics(self, video_ids: Iterable[str], timeout: float = 30) -> Dict[str, Dict]:
+        """Statistics for each video ID; IDs are fetched at most once per TTL window"""
+        now = time.monotonic()
+        results = {}
+        waiting = {}
+        flush_now = False
+
+        with self._lock:
+            for video_id in dict.fromkeys(video_ids):
+                cached = self._cache.get(video_id)
+                if cached and now - cached[0] < self.ttl:
+                    results[video_id] = cached[1]
+                    continue
+
+                # Join an in-flight or queued fetch for this ID rather than issuing another
+                future = self._inflight.get(video_id)
+                if future is None:
+                    future = Future()
+                    self._inflight[video_id] = future
+                    self._queue.append(video_id)
+                waiting[video_id] = future
+
+            if len(self._queue) >= MAX_BATCH_SIZE:
+                flush_now = True
+            elif self._queue and self._timer is None:
+                # Give concurrent callers a moment to add their IDs to the same batch
+                self._timer = threading.Timer(self.linger, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if flush_now:
+            self.flush()
+
+        for video_id, future in waiting.items():
+            results[video_id] = future.result(timeout=timeout)
+        return results
+
+    def flush(self) -> None:
+        """Send every queued ID in videos.list calls of up to 50 IDs"""
+        with self._lock:
+            queued, self._queue = self._queue, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not queued:
+            return
+
+        for start in range(0, len(queued), MAX_BATCH_SIZE):
+            batch = queued[start:start + MAX_BATCH_SIZE]
+            try:
+                with self.client_factory() as youtube:
+                    if not youtube:
+                        raise RuntimeError("YouTube client unavailable or out of quota")
+                    youtube_rate_limiter.acquire()
+                    response = youtube.videos().list(
+                        part='statistics',
+                        id=','.join(batch),
+                        maxResults=MAX_BATCH_SIZE
+                    ).execute()
+                stats = {item['id']: item.get('statistics', {}) for item in response.get('items', [])}
+                logger.info(f"Fetched statistics for {len(batch)} videos in one call")
+            except Exception as e:
+                logger.error(f"Video statistics fetch failed: {str(e)}")
+                self._resolve(batch, error=e)
+                continue
+            self._resolve(batch, stats=stats)
+
+    def _resolve(self, batch: List[str], stats: Dict[str, Dict] = None, error: Exception = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            futures = [(video_id, self._inflight.pop(video_id, None)) for video_id in batch]
+            if stats is not None:
+                for video_id in batch:
+                    # Deleted/private videos come back missing; cache them as empty too
+                    self._cache[video_id] = (now, stats.get(video_id, {}))
+                if len(self._cache) > MAX_CACHED_VIDEOS:
+                    self._cache = {k: v for k, v in self._cache.items() if now - v[0] < self.ttl}
+
+        for video_id, future in futures:
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(stats.get(video_id, {}))
@@ -1,11 +1,13 @@
-from googleapiclient.discovery import build
-import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 from typing import List, Dict, Optional, TypedDict
-import streamlit as st
-import json
-import time
-from datetime import datetime, timedelta
+from datetime import timedelta
+from src.api.client import build_client, get_api_key, youtube_client
+from src.api.suggestion_index import get_suggestion_index
+from src.api.video_stats import VideoStatsService
+from src.Audio.track_index import get_track_index
+from src.utlis.cache_store import cache_store
+from src.utlis.rate_limiter import youtube_rate_limiter
 
 # Type definitions and configuration
 class TrackInfo(TypedDict):
@@ -20,8 +22,9 @@ class VideoDetails(TypedDict):
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-CACHE_DIR = "cache"
 CACHE_DURATION = timedelta(hours=24)
+CACHE_MAX_STALE = timedelta(days=7)  # how long an expired entry may be served while it refreshes
+SIMILAR_TRACKS_LIMIT = 5
 
 EDM_LABELS = {
     "Future House": [
@@ -77,145 +80,141 @@ EDM_CHANNELS = {
     ]
 }
 
-# Add cache configuration
-def get_cache_path(key: str) -> str:
-    """Get cache file path for a key"""
-    if not os.path.exists(CACHE_DIR):
-        os.makedirs(CACHE_DIR)
-    return os.path.join(CACHE_DIR, f"{key.replace(' ', '_')}.json")
-
 def get_cached_data(key: str) -> Optional[Dict]:
     """Get data from cache if valid"""
-    cache_path = get_cache_path(key)
-    if os.path.exists(cache_path):
-        with open(cache_path, 'r') as f:
-            data = json.load(f)
-            if datetime.fromisoformat(data['timestamp']) + CACHE_DURATION > datetime.now():
-                return data['content']
-    return None
+    return cache_store.get(key)
 
 def save_to_cache(key: str, content: Dict) -> None:
     """Save data to cache"""
-    cache_path = get_cache_path(key)
-    with open(cache_path, 'w') as f:
-        json.dump({
-            'timestamp': datetime.now().isoformat(),
-            'content': content
-        }, f)
+    cache_store.set(key, content, CACHE_DURATION)
 
 def get_youtube_client() -> Optional[object]:
-    """Get YouTube client with API key"""
-    api_key = st.secrets.get("YOUTUBE_API_KEY")
+    """Get a dedicated YouTube client with API key (prefer youtube_client() for pooled, quota-scheduled use)"""
+    api_key = get_api_key()
     if not api_key:
-        st.error("YouTube API key not found in Streamlit secrets")
         return None
     
     try:
-        return build('youtube', 'v3', developerKey=api_key)
+        return build_client(api_key)
     except Exception as e:
         logger.error(f"Error initializing YouTube client: {str(e)}")
         return None
 
-def find_similar_tracks(genre: str, track_features: Dict) -> List[Dict]:
-    """Find similar tracks from top EDM channels and labels"""
+# Shared statistics fetcher: batches and dedupes videos.list calls from every caller
+video_stats = VideoStatsService(lambda: youtube_client('videos.list'))
+
+def search_tracks(essential: bool = True, **params) -> List[Dict]:
+    """Run one rate-limited search.list call on a pooled client and map the items to tracks"""
+    with youtube_client('search.list', essential=essential) as youtube:
+        if not youtube:
+            raise RuntimeError("YouTube client unavailable or out of quota")
+        youtube_rate_limiter.acquire()
+        search_response = youtube.search().list(
+            part='snippet',
+            type='video',
+            videoCategoryId='10',
+            order='viewCount',
+            **params
+        ).execute()
+    get_suggestion_index().add_search_response(search_response)
+
+    return [{
+        'title': item['snippet']['title'],
+        'channel': item['snippet']['channelTitle'],
+        'videoId': item['id']['videoId'],
+        'url': f"https://youtube.com/watch?v={item['id']['videoId']}",
+        'thumbnail': item['snippet']['thumbnails']['medium']['url']
+    } for item in search_response.get('items', [])]
+
+def find_similar_tracks(genre: str, track_features: Dict, cache_only: bool = False) -> Optional[List[Dict]]:
+    """Find similar tracks: nearest reference tracks by audio features, else top EDM channels and labels
+
+    With cache_only, nothing that spends quota runs and None means nothing was available.
+    """
     try:
+        # Answered locally in milliseconds with no quota once the index has been built
+        index = get_track_index()
+        if index is not None and len(index):
+            return index.query(track_features, SIMILAR_TRACKS_LIMIT, genre)
+
         bpm = int(track_features.get('bpm', 128))
-        cache_key = f"similar_{genre}_{bpm}"
+        if cache_only:
+            cached = cache_store.lookup(f"similar_{genre}_{bpm}")
+            return cached[0] if cached else None
+        similar_tracks = cache_store.get_or_refresh(
+            f"similar_{genre}_{bpm}", lambda: fetch_similar_tracks(genre),
+            CACHE_DURATION, CACHE_MAX_STALE
+        )
+        return similar_tracks if similar_tracks is not None else get_fallback_tracks(genre)
         
-        # Try cache first
-        cached_data = get_cached_data(cache_key)
-        if cached_data:
-            logger.info("Returning cached similar tracks")
-            return cached_data
+    except Exception as e:
+        logger.error(f"Error finding similar tracks: {str(e)}")
+        return get_fallback_tracks(genre)
 
-        youtube = get_youtube_client()
-        if not youtube:
-            return []
-        
-        all_tracks = []
-        
-        # Try searching by channel first
-        channels = EDM_CHANNELS.get(genre, EDM_CHANNELS["Future House"])
-        labels = EDM_LABELS.get(genre, EDM_LABELS["Future House"])
-        
-        # First attempt: Search by channel
-        for channel_id in channels[:1]:  # Try just one channel first to save quota
+def fetch_similar_tracks(genre: str, essential: bool = True) -> Optional[List[Dict]]:
+    """Search the genre's channels and labels live; None if nothing could be fetched
+
+    Non-essential fetches are refused once quota is down to the reserve kept for user requests.
+    """
+    channels = EDM_CHANNELS.get(genre, EDM_CHANNELS["Future House"])
+    labels = EDM_LABELS.get(genre, EDM_LABELS["Future House"])
+    
+    # Channel and label searches go out together instead of one after another
+    searches = [dict(channelId=channel_id, q=f"{genre}", maxResults=3) for channel_id in channels[:1]]
+    searches += [dict(q=f"{label} {genre}", maxResults=2) for label in labels[:2]]
+    
+    seen = set()
+    unique_tracks = []
+    pool = ThreadPoolExecutor(max_workers=len(searches))
+    try:
+        futures = {pool.submit(search_tracks, essential, **params): params for params in searches}
+        for future in as_completed(futures):
             try:
-                search_response = youtube.search().list(
-                    channelId=channel_id,
-                    q=f"{genre}",  # Simplified search query
-                    part='snippet',
-                    type='video',
-                    videoCategoryId='10',
-                    maxResults=3,
-                    order='viewCount'
-                ).execute()
-                
-                for item in search_response.get('items', []):
-                    track = {
-                        'title': item['snippet']['title'],
-                        'channel': item['snippet']['channelTitle'],
-                        'url': f"https://youtube.com/watch?v={item['id']['videoId']}",
-                        'thumbnail': item['snippet']['thumbnails']['medium']['url']
-                    }
-                    all_tracks.append(track)
-                
+                tracks = future.result()
             except Exception as e:
-                logger.warning(f"Channel search failed, trying labels: {str(e)}")
-        
-        # If channel search didn't yield enough results, try labels
-        if len(all_tracks) < 3:
-            for label in labels[:2]:  # Try just two labels to save quota
-                try:
-                    search_response = youtube.search().list(
-                        q=f"{label} {genre}",
-                        part='snippet',
-                        type='video',
-                        videoCategoryId='10',
-                        maxResults=2,
-                        order='viewCount'
-                    ).execute()
-                    
-                    for item in search_response.get('items', []):
-                        track = {
-                            'title': item['snippet']['title'],
-                            'channel': item['snippet']['channelTitle'],
-                            'url': f"https://youtube.com/watch?v={item['id']['videoId']}",
-                            'thumbnail': item['snippet']['thumbnails']['medium']['url']
-                        }
-                        all_tracks.append(track)
-                        
-                except Exception:
-                    continue
-                
-                time.sleep(0.1)  # Respect API limits
-        
-        if not all_tracks:
-            return get_fallback_tracks(genre)
-        
-        # Take top 5 unique tracks
-        seen = set()
-        unique_tracks = []
-        for track in all_tracks:
-            if track['title'] not in seen:
-                seen.add(track['title'])
-                unique_tracks.append(track)
-        
-        similar_tracks = unique_tracks[:5]
-        save_to_cache(cache_key, similar_tracks)
-        return similar_tracks
-        
+                logger.warning(f"Similar track search failed ({futures[future].get('q')}): {str(e)}")
+                continue
+            
+            # Merge and dedupe as results arrive
+            for track in tracks:
+                if track['title'] not in seen:
+                    seen.add(track['title'])
+                    unique_tracks.append(track)
+            
+            if len(unique_tracks) >= SIMILAR_TRACKS_LIMIT:
+                break
+    finally:
+        # Don't wait on searches we no longer need
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    if not unique_tracks:
+        return None
+    
+    similar_tracks = unique_tracks[:SIMILAR_TRACKS_LIMIT]
+    attach_statistics(similar_tracks)
+    return similar_tracks
+
+def attach_statistics(tracks: List[Dict]) -> None:
+    """Fill in views/likes for tracks from one batched statistics lookup"""
+    try:
+        stats = video_stats.get_statistics(track['videoId'] for track in tracks)
     except Exception as e:
-        logger.error(f"Error finding similar tracks: {str(e)}")
-        return get_fallback_tracks(genre)
+        logger.warning(f"Could not fetch track statistics: {str(e)}")
+        stats = {}
+    for track in tracks:
+        track_stats = stats.get(track['videoId'], {})
+        track['views'] = int(track_stats.get('viewCount', 0))
+        track['likes'] = int(track_stats.get('likeCount', 0))
 
-def get_fallback_tracks(genre: str) -> List<Dict]:
+def get_fallback_tracks(genre: str) -> List[Dict]:
     """Get fallback tracks when API fails"""
     return [{
         'title': f'Example {genre} Track {i}',
         'channel': 'Sample Channel',
         'url': '#',
         'thumbnail': 'https://via.placeholder.com/120x90.png',
+        'views': 0,
+        'likes': 0,
     } for i in range(1, 6)]
 
 def is_valid_track(video: Dict, search_result: Dict) -> bool:
@@ -240,12 +239,18 @@ def is_valid_track(video: Dict, search_result: Dict) -> bool:
 def analyze_keyword_realtime(keyword: str) -> Optional[Dict]:
     """Analyze keyword with caching"""
     try:
-        cache_key = f"keyword_{keyword}"
-        cached_data = get_cached_data(cache_key)
-        if cached_data:
-            return cached_data
+        return cache_store.get_or_refresh(
+            f"keyword_{keyword}", lambda: fetch_keyword_analysis(keyword),
+            CACHE_DURATION, CACHE_MAX_STALE
+        )
 
-        youtube = get_youtube_client()
+    except Exception as e:
+        logger.error(f"Keyword analysis error: {str(e)}")
+        return get_fallback_data()
+
+def fetch_keyword_analysis(keyword: str) -> Optional[Dict]:
+    """Live keyword metrics and suggestions; None without a client"""
+    with youtube_client('search.list') as youtube:
         if not youtube:
             return None
 
@@ -257,35 +262,25 @@ def analyze_keyword_realtime(keyword: str) -> Optional[Dict]:
             maxResults=5,
             regionCode='US'
         ).execute()
+    get_suggestion_index().add_search_response(search_response)
 
-        result = {
-            'score': calculate_keyword_score(search_response),
-            'competition': get_competition_level(search_response['pageInfo']['totalResults']),
-            'monthly_searches': estimate_monthly_searches(search_response['pageInfo']['totalResults']),
-            'suggestions': get_keyword_suggestions(keyword, youtube)
-        }
-
-        save_to_cache(cache_key, result)
-        return result
-
-    except Exception as e:
-        logger.error(f"Keyword analysis error: {str(e)}")
-        return get_fallback_data()
+    return {
+        'score': calculate_keyword_score(search_response),
+        'competition': get_competition_level(search_response['pageInfo']['totalResults']),
+        'monthly_searches': estimate_monthly_searches(search_response['pageInfo']['totalResults']),
+        'suggestions': get_keyword_suggestions(keyword)
+    }
 
 def calculate_keyword_score(search_response: Dict) -> float:
     """Calculate keyword potential score (0-100)"""
     total_results = search_response['pageInfo']['totalResults']
     video_ids = [item['id']['videoId'] for item in search_response['items']]
     if video_ids:
-        videos_response = youtube.videos().list(
-            part='statistics',
-            id=','.join(video_ids)
-        ).execute()
+        video_statistics = video_stats.get_statistics(video_ids)
         
         views = []
         likes = []
-        for video in videos_response['items']:
-            stats = video['statistics']
+        for stats in video_statistics.values():
             views.append(int(stats.get('viewCount', 0)))
             likes.append(int(stats.get('likeCount', 0)))
         
@@ -316,27 +311,9 @@ def estimate_monthly_searches(total_results: int) -> str:
         return "10K-100K"
     return "100K+"
 
-def get_keyword_suggestions(keyword: str, youtube) -> List[str]:
-    """Get related keyword suggestions"""
-    try:
-        response = youtube.search().list(
-            q=keyword,
-            part='snippet',
-            type='video',
-            maxResults=10,
-            videoCategoryId='10'
-        ).execute()
-        
-        suggestions = set()
-        for item in response.get('items', []):
-            title = item['snippet']['title'].lower()
-            words = title.split()
-            if len(words) > 2:
-                suggestions.add(' '.join(words[:3]))
-        
-        return list(suggestions)[:5]
-    except Exception:
-        return []
+def get_keyword_suggestions(keyword: str) -> List[str]:
+    """Get related keyword suggestions from titles already fetched, without an API call"""
+    return get_suggestion_index().suggest(keyword)
 
 def get_fallback_data() -> Dict:
     """Provide fallback data when API is unavailable"""
@@ -346,8 +323,3 @@ def get_fallback_data() -> Dict:
         'monthly_searches': '1K-10K',
         'suggestions': []
     }
-
-def handle_quota_error(e: Exception) -> bool:
-    """Check if error is due to quota exceeded"""
-    error_message = str(e).lower()
-    return 'quota' in error_message or 'rate limit' in error_message
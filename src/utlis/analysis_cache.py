@@ -0,0 +1,27 @@
+import hashlib
+from typing import Dict, Optional
+from src.utlis.cache_store import CacheStore, cache_store
+
+class AnalysisCache:
+    """Content-addressed analysis results in the shared cache store, which bounds them with its LRU eviction"""
+
+    def __init__(self, store: CacheStore = cache_store):
+        self.store = store
+
+    @staticmethod
+    def make_key(data: bytes, version: str) -> str:
+        """Hash of the uploaded bytes plus the analyzer version"""
+        digest = hashlib.sha256(data)
+        digest.update(version.encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Get analysis result, or None if it was never stored or has been evicted"""
+        return self.store.get(f"analysis_{key}")
+
+    def set(self, key: str, features: Dict) -> None:
+        """Store analysis result until the cache store evicts it as least recently used"""
+        self.store.set(f"analysis_{key}", dict(features))
+
+# Shared by every Streamlit session in this process
+analysis_cache = AnalysisCache()
@@ -1,56 +1,204 @@
 import streamlit as st
-from typing import Optional
-from datetime import datetime, timedelta
-import json
+import atexit
+import hashlib
+import logging
 import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+from src.utlis.cache_store import CACHE_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# Quota units charged per call: https://developers.google.com/youtube/v3/determine_quota_cost
+UNIT_COSTS = {
+    'search.list': 100,
+    'videos.list': 1,
+}
+DAILY_QUOTA = 10000
+ESSENTIAL_RESERVE = 0.2  # share of the day's budget only essential calls may spend
+SYNC_INTERVAL = 2.0  # seconds between exchanging usage with other processes
+USAGE_DB = CACHE_DB_PATH
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")  # quotas reset at midnight Pacific
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS key_usage (
+    day TEXT NOT NULL,
+    key_id TEXT NOT NULL,
+    units INTEGER NOT NULL,
+    PRIMARY KEY (day, key_id)
+);
+"""
+
+def _key_id(key: str) -> str:
+    """Identify a key in the usage table without storing the key itself"""
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+def _quota_day() -> str:
+    return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+def seconds_until_reset() -> float:
+    """Seconds left in the current quota day"""
+    now = datetime.now(QUOTA_TIMEZONE)
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=QUOTA_TIMEZONE)
+    return (midnight - now).total_seconds()
 
 class YouTubeKeyManager:
-    def __init__(self):
-        self.keys = st.secrets.get("YOUTUBE_API_KEYS", [])
-        self.current_key_index = 0
-        self.usage = {}
-        self.last_reset = datetime.now()
-        self._load_usage()
-    
-    def _load_usage(self):
-        """Load key usage from cache"""
-        cache_file = "cache/key_usage.json"
-        if os.path.exists(cache_file):
-            with open(cache_file, 'r') as f:
-                data = json.load(f)
-                if datetime.fromisoformat(data['timestamp']) + timedelta(days=1) > datetime.now():
-                    self.usage = data['usage']
-                else:
-                    self.usage = {key: 0 for key in self.keys}
-        else:
-            self.usage = {key: 0 for key in self.keys}
-    
-    def _save_usage(self):
-        """Save key usage to cache"""
-        cache_file = "cache/key_usage.json"
-        os.makedirs("cache", exist_ok=True)
-        with open(cache_file, 'w') as f:
-            json.dump({
-                'timestamp': datetime.now().isoformat(),
-                'usage': self.usage
-            }, f)
-    
-    def get_active_key(self) -> Optional[str]:
-        """Get current active API key"""
-        if not self.keys:
-            return None
-            
-        # Reset usage if 24 hours have passed
-        if datetime.now() - self.last_reset > timedelta(days=1):
+    """Quota scheduler: charges each call its unit cost against the key with the most budget left
+
+    Usage is shared through a table in the cache database: every process adds its own spend
+    and reads everyone else's at least every SYNC_INTERVAL, so the app, the cache warmer and
+    batch jobs schedule against the same totals.
+    """
+
+    def __init__(self, keys: List[str], daily_quota: int = DAILY_QUOTA, usage_db: str = USAGE_DB):
+        self.keys = list(dict.fromkeys(keys))
+        self.daily_quota = daily_quota
+        self.usage_db = usage_db
+        self.usage = {key: 0 for key in self.keys}
+        self.day = _quota_day()
+        self._pending = {key: 0 for key in self.keys}  # units spent here since the last sync
+        self._exhausted = set()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._last_sync = float('-inf')
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.usage_db) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.usage_db, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _sync(self, force: bool = False) -> None:
+        """Add this process's pending spend to the shared totals and read them back"""
+        if not force and time.monotonic() - self._last_sync < SYNC_INTERVAL:
+            return
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for key in self.keys:
+                    units, exhausted = self._pending[key], key in self._exhausted
+                    if units or exhausted:
+                        conn.execute(
+                            "INSERT INTO key_usage (day, key_id, units) VALUES (?, ?, ?) "
+                            "ON CONFLICT (day, key_id) DO UPDATE SET units = MAX(units + ?, ?)",
+                            (self.day, _key_id(key), max(units, self.daily_quota if exhausted else 0),
+                             units, self.daily_quota if exhausted else 0)
+                        )
+                rows = dict(conn.execute("SELECT key_id, units FROM key_usage WHERE day = ?", (self.day,)).fetchall())
+                conn.execute("DELETE FROM key_usage WHERE day < ?", (self.day,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            # Keep scheduling on local numbers; pending spend is retried on the next sync
+            logger.error(f"Could not sync key usage: {str(e)}")
+            return
+        self.usage = {key: rows.get(_key_id(key), 0) for key in self.keys}
+        self._pending = {key: 0 for key in self.keys}
+        self._exhausted.clear()
+        self._last_sync = time.monotonic()
+
+    def _roll_day(self):
+        day = _quota_day()
+        if day != self.day:
+            # Yesterday's spend is recorded under yesterday before starting over
+            self._sync(force=True)
+            self.day = day
             self.usage = {key: 0 for key in self.keys}
-            self.last_reset = datetime.now()
-            self._save_usage()
-        
-        # Find key with lowest usage
-        current_key = min(self.usage.items(), key=lambda x: x[1])[0]
-        return current_key
-    
-    def increment_usage(self, key: str, units: int = 100):
-        """Track API usage"""
-        self.usage[key] = self.usage.get(key, 0) + units
-        self._save_usage()
+            self._last_sync = float('-inf')
+
+    def _refresh(self):
+        self._roll_day()
+        self._sync()
+
+    def remaining(self) -> int:
+        """Units left today across all keys"""
+        with self._lock:
+            self._refresh()
+            return sum(max(self.daily_quota - units, 0) for units in self.usage.values())
+
+    def reserve(self) -> int:
+        """Units held back for essential calls"""
+        return int(self.daily_quota * len(self.keys) * ESSENTIAL_RESERVE)
+
+    def budget_summary(self) -> List[Dict]:
+        """Units used and left today per key, identified by hash"""
+        with self._lock:
+            self._refresh()
+            return [{'key': _key_id(key), 'used': units, 'remaining': max(self.daily_quota - units, 0)}
+                    for key, units in self.usage.items()]
+
+    def affordable(self, method: str, essential: bool = True) -> int:
+        """How many calls of `method` acquire would currently accept in one go"""
+        with self._lock:
+            self._refresh()
+            remaining = [max(self.daily_quota - units, 0) for units in self.usage.values()]
+            budget = max(remaining, default=0)
+            if not essential:
+                budget = min(budget, sum(remaining) - self.reserve())
+            return max(budget, 0) // UNIT_COSTS[method]
+
+    def acquire(self, method: str, count: int = 1, essential: bool = True) -> Optional[str]:
+        """Charge `count` calls of `method` to the key with the most budget left; None if none can afford it
+
+        Non-essential calls are refused once the day's budget drops into the essential reserve.
+        """
+        cost = UNIT_COSTS[method] * count
+        with self._lock:
+            self._refresh()
+            remaining = {key: self.daily_quota - units for key, units in self.usage.items()}
+            if not essential and sum(max(r, 0) for r in remaining.values()) - cost < self.reserve():
+                return None
+
+            affordable = [key for key, left in remaining.items() if left >= cost]
+            if not affordable:
+                logger.warning(f"YouTube quota exhausted for {method} x{count} ({cost} units)")
+                return None
+
+            key = max(affordable, key=remaining.get)
+            self.usage[key] += cost
+            self._pending[key] += cost
+            return key
+
+    def mark_exhausted(self, key: str):
+        """The API says this key is out of quota; stop scheduling it until the reset, in every process"""
+        with self._lock:
+            self.usage[key] = self.daily_quota
+            self._exhausted.add(key)
+            self._sync(force=True)
+
+    def flush(self):
+        """Record pending usage"""
+        with self._lock:
+            if any(self._pending.values()) or self._exhausted:
+                self._sync(force=True)
+
+_key_manager: Optional[YouTubeKeyManager] = None
+_key_manager_lock = threading.Lock()
+
+def get_key_manager() -> YouTubeKeyManager:
+    """Process-wide scheduler over YOUTUBE_API_KEYS (plus YOUTUBE_API_KEY) from Streamlit secrets"""
+    global _key_manager
+    with _key_manager_lock:
+        if _key_manager is None:
+            keys = list(st.secrets.get("YOUTUBE_API_KEYS", []))
+            if st.secrets.get("YOUTUBE_API_KEY"):
+                keys.append(st.secrets["YOUTUBE_API_KEY"])
+            _key_manager = YouTubeKeyManager(keys)
+        return _key_manager
+
+def set_key_manager(manager: YouTubeKeyManager) -> None:
+    """Replace the process-wide scheduler, e.g. with fake keys for load tests"""
+    global _key_manager
+    with _key_manager_lock:
+        _key_manager = manager
@@ -1,7 +1,6 @@
 import functools
-from datetime import datetime, timedelta
-import json
-import os
+from datetime import timedelta
+from src.utlis.cache_store import cache_store, call_key
 
 def cache_result(cache_duration: timedelta = timedelta(hours=24)):
     """Cache function results to avoid API calls"""
@@ -9,26 +8,18 @@ def cache_result(cache_duration: timedelta = timedelta(hours=24)):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             # Create cache key from function name and arguments
-            cache_key = f"{func.__name__}_{str(args)}_{str(kwargs)}"
-            cache_file = f"cache/{cache_key}.json"
+            cache_key = call_key(func, args, kwargs)
             
             # Check cache
-            if os.path.exists(cache_file):
-                with open(cache_file, 'r') as f:
-                    data = json.load(f)
-                    if datetime.fromisoformat(data['timestamp']) + cache_duration > datetime.now():
-                        return data['result']
+            cached = cache_store.get(cache_key)
+            if cached is not None:
+                return cached
             
             # Get fresh result
             result = func(*args, **kwargs)
             
             # Save to cache
-            os.makedirs("cache", exist_ok=True)
-            with open(cache_file, 'w') as f:
-                json.dump({
-                    'timestamp': datetime.now().isoformat(),
-                    'result': result
-                }, f)
+            cache_store.set(cache_key, result, cache_duration)
             
             return result
         return wrapper
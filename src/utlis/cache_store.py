@@ -0,0 +1,299 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Callable, Iterator, Optional, Tuple
+from src.utlis.executor import get_refresh_pool
+from src.utlis.single_flight import SingleFlight
+from src.utlis.telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+CACHE_DB_PATH = os.path.join("cache", "cache.db")
+MAX_ENTRIES = 50000
+MEMORY_ENTRIES = 1024
+PRUNE_INTERVAL = 500  # writes between expiry/size sweeps
+SCHEMA_VERSION = 2
+LEASE_SECONDS = 30.0  # longest another process waits on a loader before running its own
+LEASE_POLL_SECONDS = 0.05
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    stale_at REAL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+"""
+
+def hash_key(key: str) -> str:
+    """Fixed-length key for arbitrary cache key strings"""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def namespace(key: str) -> str:
+    """Key family for telemetry: "similar" for "similar_Tech House_128", the function for call_key keys"""
+    if ":" in key:
+        return key.split(":", 1)[0]
+    return key.split("_", 1)[0]
+
+def call_key(func, args: tuple, kwargs: dict) -> str:
+    """Stable cache key for a function call"""
+    params = json.dumps([args, kwargs], sort_keys=True, default=str)
+    return f"{func.__module__}.{func.__qualname__}:{params}"
+
+class CacheStore:
+    """JSON values in one SQLite (WAL) database with soft/hard TTLs and LRU eviction, fronted by an in-memory LRU
+
+    An entry is fresh for `ttl`, then may be served stale for `max_stale` while it is refreshed.
+    """
+
+    def __init__(self, path: str = CACHE_DB_PATH, max_entries: int = MAX_ENTRIES,
+                 memory_entries: int = MEMORY_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        self._refreshing = set()
+        self._flights = SingleFlight()
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # One connection shared by all threads, serialized by self._lock; WAL lets other processes read while we write
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                # Entries are disposable; rebuild rather than migrate
+                conn.execute("DROP TABLE IF EXISTS entries")
+                conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._prune()
+        return self._conn
+
+    def _remember(self, key: str, stale_at: Optional[float], expires_at: Optional[float], value: str) -> None:
+        self._memory[key] = (stale_at, expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read(self, key: str, now: float) -> Optional[tuple]:
+        """(stale_at, expires_at, payload) for an entry that hasn't hit its hard expiry"""
+        hashed = hash_key(key)
+        try:
+            with self._lock:
+                entry = self._memory.get(hashed)
+                if entry is None:
+                    entry = self._connect().execute(
+                        "SELECT stale_at, expires_at, value FROM entries WHERE key = ?", (hashed,)
+                    ).fetchone()
+                    if entry is None:
+                        return None
+                    if entry[1] is None or entry[1] > now:
+                        self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, hashed))
+                        self._remember(hashed, *entry)
+                else:
+                    self._memory.move_to_end(hashed)
+        except sqlite3.Error as e:
+            logger.error(f"Cache read failed: {str(e)}")
+            return None
+
+        if entry[1] is not None and entry[1] <= now:
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for a key, or None if missing or no longer fresh"""
+        now = time.time()
+        entry = self._read(key, now)
+        if entry is None:
+            telemetry.record_cache(namespace(key), "miss")
+            return None
+        # Check freshness before paying for the JSON parse
+        if entry[0] is not None and entry[0] <= now:
+            telemetry.record_cache(namespace(key), "stale")
+            return None
+        telemetry.record_cache(namespace(key), "hit")
+        return json.loads(entry[2])
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """(value, is_stale) for a key, or None if missing or past its hard expiry"""
+        cached = self._lookup(key)
+        telemetry.record_cache(namespace(key), "miss" if cached is None else "stale" if cached[1] else "hit")
+        return cached
+
+    def is_fresh(self, key: str) -> bool:
+        """Whether a key holds a value that hasn't gone stale, without counting as a cache access"""
+        cached = self._lookup(key)
+        return cached is not None and not cached[1]
+
+    def _lookup(self, key: str) -> Optional[Tuple[Any, bool]]:
+        now = time.time()
+        entry = self._read(key, now)
+        if entry is None:
+            return None
+        return json.loads(entry[2]), entry[0] is not None and entry[0] <= now
+
+    def set(self, key: str, value: Any, ttl: Optional[timedelta] = None,
+            max_stale: Optional[timedelta] = None) -> None:
+        """Store a JSON-serializable value; ttl=None keeps it until evicted"""
+        hashed = hash_key(key)
+        now = time.time()
+        stale_at = expires_at = None
+        if ttl is not None:
+            stale_at = now + ttl.total_seconds()
+            expires_at = stale_at + (max_stale.total_seconds() if max_stale is not None else 0)
+        payload = json.dumps(value)
+        try:
+            with self._lock:
+                self._connect().execute(
+                    "INSERT OR REPLACE INTO entries (key, value, stale_at, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (hashed, payload, stale_at, expires_at, now)
+                )
+                self._remember(hashed, stale_at, expires_at, payload)
+                self._writes += 1
+                if self._writes % PRUNE_INTERVAL == 0:
+                    self._prune()
+        except sqlite3.Error as e:
+            logger.error(f"Cache write failed: {str(e)}")
+
+    def get_or_refresh(self, key: str, loader: Callable[[], Any], ttl: timedelta,
+                       max_stale: timedelta) -> Any:
+        """Stale-while-revalidate: serve a cached value, refreshing it in the background once stale
+
+        Only a miss (or an entry past ttl + max_stale) calls the loader in the caller's thread,
+        and concurrent misses for a key share one loader call across threads and processes.
+        A loader result of None is returned but not cached.
+        """
+        cached = self.lookup(key)
+        if cached is not None:
+            value, stale = cached
+            if stale:
+                self._refresh_in_background(key, loader, ttl, max_stale)
+            return value
+
+        return self._flights.do(key, lambda: self._load(key, loader, ttl, max_stale))
+
+    def _load(self, key: str, loader: Callable[[], Any], ttl: timedelta, max_stale: timedelta,
+              wait: bool = True) -> Any:
+        """Run the loader while holding the key's lease, unless another process fills the entry first"""
+        deadline = time.monotonic() + LEASE_SECONDS
+        while True:
+            # Re-read from disk: another process may have just written the entry
+            with self._lock:
+                self._memory.pop(hash_key(key), None)
+            cached = self._lookup(key)
+            if cached is not None and not cached[1]:
+                return cached[0]
+            if self._acquire_lease(key):
+                break
+            if not wait:
+                # Someone else is already refreshing it
+                return cached[0] if cached is not None else None
+            if time.monotonic() >= deadline:
+                logger.warning("Cache lease wait timed out; loading without it")
+                return self._store_loaded(key, loader, ttl, max_stale)
+            time.sleep(LEASE_POLL_SECONDS)
+
+        try:
+            return self._store_loaded(key, loader, ttl, max_stale)
+        finally:
+            self._release_lease(key)
+
+    def _store_loaded(self, key: str, loader: Callable[[], Any], ttl: timedelta, max_stale: timedelta) -> Any:
+        value = loader()
+        if value is not None:
+            self.set(key, value, ttl, max_stale)
+        return value
+
+    def _acquire_lease(self, key: str) -> bool:
+        """Claim the right to load a key; leases lapse after LEASE_SECONDS if the holder dies"""
+        hashed = hash_key(key)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (hashed, now))
+                return conn.execute(
+                    "INSERT OR IGNORE INTO leases (key, expires_at) VALUES (?, ?)", (hashed, now + LEASE_SECONDS)
+                ).rowcount == 1
+        except sqlite3.Error as e:
+            # Loading without coordination beats not loading at all
+            logger.error(f"Cache lease failed: {str(e)}")
+            return True
+
+    def _release_lease(self, key: str) -> None:
+        try:
+            with self._lock:
+                self._connect().execute("DELETE FROM leases WHERE key = ?", (hash_key(key),))
+        except sqlite3.Error as e:
+            logger.error(f"Cache lease release failed: {str(e)}")
+
+    def _refresh_in_background(self, key: str, loader: Callable[[], Any], ttl: timedelta,
+                               max_stale: timedelta) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._load(key, loader, ttl, max_stale, wait=False)
+            except Exception as e:
+                # Keep serving the stale value; the next read past stale_at retries
+                logger.warning(f"Background cache refresh failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        get_refresh_pool().submit(refresh)
+
+    def values(self) -> Iterator[Any]:
+        """Every stored value that hasn't hit its hard expiry, e.g. to seed derived indexes"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT value FROM entries WHERE expires_at IS NULL OR expires_at > ?", (time.time(),)
+            ).fetchall()
+        for (payload,) in rows:
+            yield json.loads(payload)
+
+    def delete(self, key: str) -> None:
+        """Drop a key from both tiers"""
+        hashed = hash_key(key)
+        try:
+            with self._lock:
+                self._memory.pop(hashed, None)
+                self._connect().execute("DELETE FROM entries WHERE key = ?", (hashed,))
+        except sqlite3.Error as e:
+            logger.error(f"Cache delete failed: {str(e)}")
+
+    def _prune(self) -> None:
+        """Delete expired entries, then the least recently used beyond max_entries (caller holds the lock)"""
+        now = time.time()
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        excess = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            )
+            self._memory.clear()
+
+# Shared by every Streamlit session in this process
+cache_store = CacheStore()
@@ -0,0 +1,76 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+REFRESH_WORKERS = 4
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+_refresh_pool: Optional[ThreadPoolExecutor] = None
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Process-wide pool for CPU-bound audio analysis, shared by all sessions"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn: forking a threaded Streamlit server is not safe
+            _process_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            atexit.register(_process_pool.shutdown, wait=False, cancel_futures=True)
+        return _process_pool
+
+def get_refresh_pool() -> ThreadPoolExecutor:
+    """Process-wide threads for background cache refreshes, outliving any one session"""
+    global _refresh_pool
+    with _process_pool_lock:
+        if _refresh_pool is None:
+            _refresh_pool = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+            atexit.register(_refresh_pool.shutdown, wait=False, cancel_futures=True)
+        return _refresh_pool
+
+def remove_when_done(path: str, futures: List[Future]) -> None:
+    """Delete a temporary file once every future reading it has finished, including ones nobody waits on"""
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    if not futures:
+        os.remove(path)
+    for future in futures:
+        future.add_done_callback(done)
+
+def _attach_script_context(ctx) -> None:
+    """Let worker threads use st.secrets/st.warning on behalf of the calling session"""
+    if ctx is not None:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+@contextmanager
+def session_thread_pool(max_workers: int = 8) -> Iterator[ThreadPoolExecutor]:
+    """Thread pool for network-bound API calls, bound to the current Streamlit session"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+    except ImportError:
+        ctx = None
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, initializer=_attach_script_context, initargs=(ctx,))
+    try:
+        yield pool
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,162 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_FILE = os.path.join("cache", "metrics.prom")
+EXPORT_INTERVAL = 15.0
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Prometheus-style fixed-bucket histogram"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by interpolating within its bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+def _labels(**labels) -> Labels:
+    return tuple(sorted(labels.items()))
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+class Telemetry:
+    """Process-wide counters and latency histograms for API calls and cache lookups"""
+
+    def __init__(self, metrics_file: str = METRICS_FILE, export_interval: float = EXPORT_INTERVAL):
+        self.metrics_file = metrics_file
+        self.export_interval = export_interval
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._last_export = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _inc(self, name: str, labels: Labels, value: float = 1) -> None:
+        series = self.counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + value
+
+    def record_call(self, method: str, latency: float, units: int, items: int,
+                    error_class: Optional[str] = None, outcomes: Optional[Dict[str, int]] = None) -> None:
+        """One YouTube API call, or a batch whose requests ended in `outcomes` (outcome -> count)"""
+        with self._lock:
+            for outcome, n in (outcomes or {error_class or "ok": 1}).items():
+                self._inc("youtube_api_requests_total", _labels(method=method, outcome=outcome), n)
+            self._inc("youtube_api_units_total", _labels(method=method), units)
+            self._inc("youtube_api_result_items_total", _labels(method=method), items)
+            self.histograms.setdefault("youtube_api_latency_seconds", {}) \
+                .setdefault(_labels(method=method), Histogram()).observe(latency)
+        self._maybe_export()
+
+    def record_cache(self, namespace: str, outcome: str) -> None:
+        """A cache lookup: outcome is hit, stale or miss"""
+        with self._lock:
+            self._inc("cache_requests_total", _labels(namespace=namespace, outcome=outcome))
+        self._maybe_export()
+
+    def api_summary(self) -> List[Dict]:
+        """Per-method calls, errors, units and latency percentiles"""
+        with self._lock:
+            requests = self.counters.get("youtube_api_requests_total", {})
+            units = self.counters.get("youtube_api_units_total", {})
+            latency = self.histograms.get("youtube_api_latency_seconds", {})
+            rows = {}
+            for labels, n in requests.items():
+                label_map = dict(labels)
+                row = rows.setdefault(label_map["method"], {"method": label_map["method"], "calls": 0, "errors": {}})
+                row["calls"] += n
+                if label_map["outcome"] != "ok":
+                    row["errors"][label_map["outcome"]] = n
+            for method, row in rows.items():
+                hist = latency.get(_labels(method=method))
+                row["units"] = units.get(_labels(method=method), 0)
+                row["p50_seconds"] = hist.quantile(0.5) if hist else None
+                row["p95_seconds"] = hist.quantile(0.95) if hist else None
+                row["p99_seconds"] = hist.quantile(0.99) if hist else None
+            return sorted(rows.values(), key=lambda r: r["method"])
+
+    def cache_summary(self) -> List[Dict]:
+        """Per-namespace hit/stale/miss counts and hit ratio"""
+        with self._lock:
+            rows = {}
+            for labels, n in self.counters.get("cache_requests_total", {}).items():
+                label_map = dict(labels)
+                row = rows.setdefault(label_map["namespace"],
+                                      {"namespace": label_map["namespace"], "hit": 0, "stale": 0, "miss": 0})
+                row[label_map["outcome"]] += n
+            for row in rows.values():
+                total = row["hit"] + row["stale"] + row["miss"]
+                # Stale hits are still served from cache
+                row["hit_ratio"] = (row["hit"] + row["stale"]) / total if total else None
+            return sorted(rows.values(), key=lambda r: r["namespace"])
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, n in zip(hist.buckets + (float("inf"),), hist.counts):
+                        cumulative += n
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{name}_bucket{_format_labels(labels, (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {hist.sum:g}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self) -> None:
+        """Write the metrics file for a node_exporter textfile collector"""
+        try:
+            os.makedirs(os.path.dirname(self.metrics_file) or ".", exist_ok=True)
+            tmp_path = f"{self.metrics_file}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, self.metrics_file)
+        except OSError as e:
+            logger.error(f"Could not write metrics file: {str(e)}")
+
+    def _maybe_export(self) -> None:
+        with self._lock:
+            if time.monotonic() - self._last_export < self.export_interval:
+                return
+            self._last_export = time.monotonic()
+        self.export()
+
+# Shared by every Streamlit session in this process
+telemetry = Telemetry()